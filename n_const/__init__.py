@@ -12,13 +12,31 @@ except:
 
 # Modules
 from . import constants
+from . import lines
 from . import pointing
 from . import obsparams
+from . import table
+from . import recorrection
+from . import snapshot
+from . import visibility
+from . import gridding
+from . import refraction
+from . import residuals
+from . import convert
 
 # Aliases
 from .constants import *
+from .lines import *
 from .pointing import *
 from .obsparams import *
+from .table import *
+from .recorrection import *
+from .snapshot import *
+from .visibility import *
+from .gridding import *
+from .refraction import *
+from .residuals import *
+from .convert import *
 
 from . import deprecated
 
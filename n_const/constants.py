@@ -11,6 +11,7 @@ import astropy.units as u
 from astropy.coordinates import EarthLocation
 
 from .deprecated import Constants
+from .lines import LineCatalog
 
 
 # Location
@@ -30,12 +31,11 @@ AC240 = Constants(ch_num=16384, bandwidth=1 * u.GHz)
 """Parameters of AC240 spectrometer."""
 
 # Rest frequency
-REST_FREQ = Constants(
-    j10_12co=115.271202 * u.GHz,
-    j10_13co=110.201353 * u.GHz,
-    j10_c18o=109.782173 * u.GHz,
-    j21_12co=230.538000 * u.GHz,
-    j21_13co=220.398681 * u.GHz,
-    j21_c18o=219.560354 * u.GHz,
+REST_FREQ = LineCatalog.default().to_constants(
+    ["j10_12co", "j10_13co", "j10_c18o", "j21_12co", "j21_13co", "j21_c18o"]
 )
-"""Rest frequencies of CO line emissions. [Ref. ISBN978-4-535-60766-8]"""
+"""Rest frequencies of CO line emissions. [Ref. ISBN978-4-535-60766-8]
+
+Taken from ``LineCatalog.default()``, which contains more lines.
+
+"""
@@ -0,0 +1,358 @@
+"""Convert observation parameters between alpaca style .obs and .obs.toml formats.
+
+Corresponding parameters of the two formats are listed in :data:`FIELD_MAP`.
+Parameters not listed there can't be converted, and are reported instead.
+
+TOML is read by standard library ``tomllib`` if available, and written by a minimal
+emitter, which doesn't preserve any style but is much faster than ``tomlkit``.
+
+"""
+
+__all__ = [
+    "FieldMap",
+    "FIELD_MAP",
+    "ConversionResult",
+    "obs_to_toml",
+    "toml_to_obs",
+    "convert_file",
+    "convert_tree",
+]
+
+import argparse
+import json
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import astropy.units as u
+from tomlkit.toml_file import TOMLFile
+
+from .obsparams import ObsParams, obsfile_parser
+
+try:
+    import tomllib
+except ImportError:  # Python<3.11
+    tomllib = None
+
+
+class FieldMap(NamedTuple):
+    """Correspondence of a parameter between .obs and .obs.toml formats."""
+
+    obs: str
+    """Name in .obs file."""
+    toml: str
+    """Name in .obs.toml file."""
+    table: str
+    """TOML table the parameter belongs to."""
+    unit: Optional[str] = None
+    """Unit of the value in .obs file. If None, the value is copied as is."""
+    values: Optional[Dict[Any, Any]] = None
+    """Mapping from .obs values to TOML values, for enumerated parameters."""
+
+
+FIELD_MAP = (
+    FieldMap("observer", "OBSERVER", "observation_property"),
+    FieldMap("object", "OBJECT", "observation_property"),
+    FieldMap("molecule_1", "MOLECULE_1", "observation_property"),
+    FieldMap("lambda_on", "LambdaOn", "coordinate", "deg"),
+    FieldMap("beta_on", "BetaOn", "coordinate", "deg"),
+    FieldMap("lambda_off", "LambdaOff", "coordinate", "deg"),
+    FieldMap("beta_off", "BetaOff", "coordinate", "deg"),
+    FieldMap("otadel", "OTADEL", "coordinate", values={"Y": True, "N": False}),
+    FieldMap("start_pos_x", "StartPositionX", "coordinate", "arcsec"),
+    FieldMap("start_pos_y", "StartPositionY", "coordinate", "arcsec"),
+    FieldMap("coordsys", "COORD_SYS", "coordinate"),
+    FieldMap(
+        "scan_direction", "SCAN_DIRECTION", "scan_property", values={0: "X", 1: "Y"}
+    ),
+    FieldMap("N", "n", "scan_property"),
+    FieldMap("grid", "scan_spacing", "scan_property", "arcsec"),
+    FieldMap("otflen", "scan_length", "scan_property", "s"),
+    FieldMap("otfvel", "scan_velocity", "scan_property", "arcsec/s"),
+    FieldMap("lamp_pixels", "ramp_pixel", "scan_property"),
+    FieldMap("exposure", "integ_on", "scan_property", "s"),
+    FieldMap("exposure_off", "integ_off", "calibration", "s"),
+    FieldMap("load_interval", "load_interval", "calibration", "min"),
+)
+"""Parameters convertible between .obs and .obs.toml formats."""
+
+_BY_OBS = {field.obs: field for field in FIELD_MAP}
+_BY_TOML = {field.toml: field for field in FIELD_MAP}
+
+
+class ConversionResult(NamedTuple):
+    """Outcome of conversion of a file."""
+
+    source: Path
+    destination: Optional[Path]
+    """Path to the converted file, None if the conversion failed."""
+    unmapped: Tuple[str, ...] = ()
+    """Parameters in the source which aren't converted."""
+    error: Optional[str] = None
+    """Description of the error, if the conversion failed."""
+
+
+def obs_to_toml(
+    params: Dict[str, Any]
+) -> Tuple[Dict[str, Dict[str, Any]], Tuple[str, ...]]:
+    """Convert parameters read by :func:`~n_const.obsparams.obsfile_parser`.
+
+    Returns
+    -------
+    tables
+        TOML tables in the order of :data:`FIELD_MAP`, each of which maps parameter
+        names to values. Values with units are given as strings, e.g.
+        ``"600arcsec/s"``.
+    unmapped
+        Names of parameters not listed in :data:`FIELD_MAP`.
+
+    """
+    tables: Dict[str, Dict[str, Any]] = {}
+    for field in FIELD_MAP:
+        if field.obs not in params:
+            continue
+        value = params[field.obs]
+        if field.values is not None:
+            value = field.values[value.upper() if isinstance(value, str) else value]
+        elif field.unit is not None:
+            value = f"{value!r}{field.unit}"
+        tables.setdefault(field.table, {})[field.toml] = value
+    unmapped = [k for k in params if k not in _BY_OBS]
+    return tables, tuple(unmapped)
+
+
+def toml_to_obs(
+    tables: Dict[str, Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """Convert TOML tables of observation parameters, the inverse of
+    :func:`obs_to_toml`.
+
+    Returns
+    -------
+    params
+        Parameters in .obs format, in the order of :data:`FIELD_MAP`.
+    unmapped
+        Names of parameters not listed in :data:`FIELD_MAP`.
+
+    """
+    flat = {k: v for table in tables.values() for k, v in table.items()}
+    unmapped = tuple(k for k in flat if k not in _BY_TOML)
+    parsed = ObsParams._make_quantity({k: v for k, v in flat.items() if k in _BY_TOML})
+
+    params = {}
+    for field in FIELD_MAP:
+        if field.toml not in parsed:
+            continue
+        value = parsed[field.toml]
+        if field.values is not None:
+            inverse = {v: k for k, v in field.values.items()}
+            value = inverse[value.upper() if isinstance(value, str) else bool(value)]
+        elif field.unit is not None:
+            value = float(value.to_value(field.unit))
+        elif isinstance(value, u.Quantity):
+            value = value.to_value(u.dimensionless_unscaled)
+            value = int(value) if float(value).is_integer() else float(value)
+        else:
+            value = str(value)
+        params[field.obs] = value
+    return params, unmapped
+
+
+def _load_toml(path: os.PathLike) -> Dict[str, Dict[str, Any]]:
+    if tomllib is None:
+        return TOMLFile(path).read()
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "nan"
+        return repr(value) if math.isfinite(value) else ("inf" if value > 0 else "-inf")
+    if isinstance(value, dict) and not value:
+        return "{}"
+    return json.dumps(str(value))
+
+
+def _dumps_toml(tables: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    for table, params in tables.items():
+        lines.append(f"[{table}]")
+        lines.extend(f"{k} = {_toml_value(v)}" for k, v in params.items())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _dumps_obs(params: Dict[str, Any]) -> str:
+    lines = []
+    for name, value in params.items():
+        value = json.dumps(value) if isinstance(value, str) else repr(value)
+        lines.append(f"{name}={value}")
+    return "\n".join(lines) + "\n"
+
+
+def _destination(source: Path) -> Path:
+    if source.name.endswith(".obs.toml"):
+        return source.with_suffix("")
+    return source.with_name(source.name + ".toml")
+
+
+def convert_file(
+    source: os.PathLike,
+    destination: Optional[os.PathLike] = None,
+    *,
+    overwrite: bool = False,
+) -> ConversionResult:
+    """Convert .obs file to .obs.toml file, or vice versa.
+
+    Direction of the conversion is determined by the file name; files whose name
+    ends with ``.obs.toml`` are converted to .obs format, others to .obs.toml
+    format.
+
+    Parameters
+    ----------
+    source
+        Path to the file to convert.
+    destination
+        Path to write the result to. Defaults to ``source`` with ``.toml`` suffix
+        added or removed.
+    overwrite
+        If False, existing ``destination`` is left untouched and the conversion
+        fails. Parameters listed in ``unmapped`` of the result are lost in the
+        converted file, so overwriting an original file loses data.
+
+    Examples
+    --------
+    >>> result = convert_file("tests/horizon.obs", "horizon.obs.toml")
+    >>> result.unmapped[:3]
+    ('offset_Az', 'offset_El', 'vlsr')
+    >>> ObsParams.from_file("horizon.obs.toml").scan_velocity
+    <Quantity 50. arcsec / s>
+
+    """
+    source = Path(source)
+    destination = _destination(source) if destination is None else Path(destination)
+    try:
+        if destination.exists() and not overwrite:
+            raise FileExistsError(f"{destination} already exists")
+        if source.name.endswith(".obs.toml"):
+            params, unmapped = toml_to_obs(_load_toml(source))
+            content = _dumps_obs(params)
+        else:
+            tables, unmapped = obs_to_toml(obsfile_parser(source))
+            content = _dumps_toml(tables)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_text(content)
+    except Exception as e:
+        return ConversionResult(source, None, error=f"{type(e).__name__}: {e}")
+    return ConversionResult(source, destination, unmapped)
+
+
+def convert_tree(
+    source_dir: os.PathLike,
+    output_dir: Optional[os.PathLike] = None,
+    *,
+    to: str = "toml",
+    processes: Optional[int] = None,
+    overwrite: bool = False,
+) -> List[ConversionResult]:
+    """Convert all files under a directory tree.
+
+    Parameters
+    ----------
+    source_dir
+        Directory to search for ``*.obs`` files (``to="toml"``) or ``*.obs.toml``
+        files (``to="obs"``) recursively.
+    output_dir
+        Directory to write the results to, mirroring the structure of
+        ``source_dir``. Defaults to ``source_dir``, i.e. results are written next to
+        the sources, which is allowed only for ``to="toml"``; converted .obs files
+        lack unmapped parameters, so they should never replace original ones.
+    to
+        Target format, either ``"toml"`` or ``"obs"``.
+    processes
+        Number of worker processes. If not specified, files are converted in this
+        process.
+    overwrite
+        If True, existing files in ``output_dir`` are overwritten. Otherwise
+        conversion of such files fails, without touching them.
+
+    Returns
+    -------
+    results
+        Outcome of conversion of each file, sorted by path. A file which failed to
+        be converted doesn't stop the others.
+
+    Examples
+    --------
+    >>> results = convert_tree("archive", "normalized", processes=8)
+    >>> [r for r in results if r.error is not None]
+    []
+
+    """
+    if to not in ("toml", "obs"):
+        raise ValueError(f"Unknown target format {to!r}")
+    source_dir = Path(source_dir)
+    output_dir = source_dir if output_dir is None else Path(output_dir)
+    if to == "obs" and output_dir.resolve() == source_dir.resolve():
+        raise ValueError("Conversion to .obs requires output_dir other than source.")
+    sources = sorted(source_dir.rglob("*.obs" if to == "toml" else "*.obs.toml"))
+    destinations = [
+        output_dir / _destination(path).relative_to(source_dir) for path in sources
+    ]
+    convert = partial(convert_file, overwrite=overwrite)
+    if processes is None:
+        return list(map(convert, sources, destinations))
+    with ProcessPoolExecutor(processes) as executor:
+        chunksize = max(1, len(sources) // (processes * 16))
+        return list(executor.map(convert, sources, destinations, chunksize=chunksize))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line interface of ``convert_tree``."""
+    parser = argparse.ArgumentParser(
+        prog="n-const-convert", description=convert_tree.__doc__.split("\n")[0]
+    )
+    parser.add_argument("source", type=Path, help="Directory to search for files.")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Directory to write the results to."
+    )
+    parser.add_argument(
+        "--to", choices=("toml", "obs"), default="toml", help="Target format."
+    )
+    parser.add_argument(
+        "-j", "--processes", type=int, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true", help="Overwrite existing files."
+    )
+    args = parser.parse_args(argv)
+
+    results = convert_tree(
+        args.source,
+        args.output,
+        to=args.to,
+        processes=args.processes,
+        overwrite=args.force,
+    )
+    unmapped = Counter(name for r in results for name in r.unmapped)
+    for r in results:
+        if r.error is not None:
+            print(f"{r.source}: {r.error}")
+    failed = sum(r.error is not None for r in results)
+    print(f"{len(results) - failed} converted, {failed} failed")
+    for name, count in unmapped.most_common():
+        print(f"unmapped {name}: {count} file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,27 @@
+import hashlib
+import math
+import threading
 from collections.abc import ItemsView, KeysView, ValuesView
+from contextlib import contextmanager
+from functools import lru_cache
+from numbers import Integral, Real
 from types import SimpleNamespace
-from typing import Any, Hashable, Iterator, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+import numpy as np
+from astropy.units import Quantity
 
 
 class DataClass(SimpleNamespace):
@@ -24,9 +45,53 @@ class DataClass(SimpleNamespace):
 
     """
 
+    __slots__ = ("_derived", "_digests")
+    # Caches of ``derived_property`` values and digests of parameters, kept out of
+    # ``__dict__`` so that they're not taken as parameters.
+
+    _derived_dependencies = {}
+    # Names of parameters each ``derived_property`` depends on.
+
     def __init__(self, **kwargs: Any):
+        self._check_writable(kwargs)
         super().__init__(**kwargs)
 
+    def _check_writable(self, names: Iterable[Hashable]) -> None:
+        """Raise AttributeError if any of ``names`` is a ``derived_property``."""
+        cls = type(self)
+        for name in names:
+            if isinstance(name, str) and isinstance(
+                getattr(cls, name, None), derived_property
+            ):
+                raise AttributeError(f"Derived value {name!r} is read-only.")
+
+    def _changed(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        """Invalidate cached values which depend on ``keys``, or all of them if
+        ``keys`` is None."""
+        derived = getattr(self, "_derived", None)
+        digests = getattr(self, "_digests", None)
+        if keys is None:
+            for cache in (derived, digests):
+                if cache:
+                    cache.clear()
+            return
+        if digests:
+            digests.pop(_FINGERPRINT, None)
+            for key in keys:
+                digests.pop(key, None)
+        if derived:
+            dependencies = self._derived_dependencies
+            for name in [k for k in derived if not dependencies[k].isdisjoint(keys)]:
+                del derived[name]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        self._changed((name,))
+
+    def __delattr__(self, name: str) -> None:
+        super().__delattr__(name)
+        self._changed((name,))
+
     def __repr__(self) -> str:
         return super().__repr__().replace("namespace", self.__class__.__name__)
 
@@ -40,11 +105,14 @@ class DataClass(SimpleNamespace):
 
     def __setitem__(self, name: Hashable, value: Any) -> None:
         """Support value assignment using dict[key] = value format."""
+        self._check_writable((name,))
         self.__dict__[name] = value
+        self._changed((name,))
 
     def __delitem__(self, name: Hashable) -> None:
         """Equivalent to ``dict.__delitem__`` method."""
         del self.__dict__[name]
+        self._changed((name,))
 
     def __contains__(self, key: Hashable) -> bool:
         """Equivalent to ``dict.__contains__()`` method."""
@@ -57,6 +125,7 @@ class DataClass(SimpleNamespace):
     def clear(self) -> None:
         """Equivalent to ``dict.clear()`` method."""
         self.__dict__.clear()
+        self._changed()
 
     def copy(self) -> "DataClass":
         """Equivalent to ``dict.copy()`` method."""
@@ -77,13 +146,17 @@ class DataClass(SimpleNamespace):
     def pop(self, key: Hashable, default: Any = KeyError) -> Any:
         """Equivalent to ``dict.pop(key, default)`` method."""
         if default is KeyError:
-            return self.__dict__.pop(key)
+            value = self.__dict__.pop(key)
         else:
-            return self.__dict__.pop(key, default)
+            value = self.__dict__.pop(key, default)
+        self._changed((key,))
+        return value
 
     def popitem(self) -> Tuple[Hashable, Any]:
         """Equivalent to ``dict.popitem()`` method."""
-        return self.__dict__.popitem()
+        item = self.__dict__.popitem()
+        self._changed(item[:1])
+        return item
 
     def __reversed__(self) -> Iterator[Hashable]:
         """Equivalent to ``dict.__reversed__()`` method."""
@@ -91,7 +164,9 @@ class DataClass(SimpleNamespace):
 
     def update(self, other: "DataClass") -> None:
         """Equivalent to ``dict.update()`` method."""
+        self._check_writable(other.__dict__)
         self.__dict__.update(other.__dict__)
+        self._changed(other.__dict__.keys())
 
     def values(self) -> ValuesView:
         """Equivalent to ``dict.values()`` method."""
@@ -104,3 +179,283 @@ class DataClass(SimpleNamespace):
     def __ne__(self, other: "DataClass") -> bool:
         """Equivalent to ``dict.__ne__()`` method."""
         return self.__dict__ != other.__dict__
+
+    def fingerprint(self) -> str:
+        """Digest of the parameters, to be used as a key of caches.
+
+        The digest doesn't depend on order of the parameters, units of quantities
+        (as long as they're equivalent) nor formatting of floats, and is stable
+        across processes. Digests of each parameter are cached and only those
+        of changed parameters are recomputed, but in-place modification of the
+        values (e.g. elements of arrays) isn't detected.
+
+        Examples
+        --------
+        >>> a = DataClass(length=1 * u.km, name="a")
+        >>> b = DataClass(name="a", length=1000 * u.m)
+        >>> a.fingerprint() == b.fingerprint()
+        True
+
+        """
+        try:
+            digests = self._digests
+        except AttributeError:
+            digests = {}
+            object.__setattr__(self, "_digests", digests)
+        try:
+            return digests[_FINGERPRINT]
+        except KeyError:
+            pass
+
+        for key, value in self.__dict__.items():
+            if key not in digests:
+                digest = hashlib.sha256(_canonical(key) + _canonical(value))
+                digests[key] = digest.digest()
+        fingerprint = hashlib.sha256(
+            FINGERPRINT_VERSION + type(self).__name__.encode("utf-8")
+        )
+        for digest in sorted(digests[k] for k in self.__dict__):
+            fingerprint.update(digest)
+        digests[_FINGERPRINT] = fingerprint.hexdigest()
+        return digests[_FINGERPRINT]
+
+
+FINGERPRINT_VERSION = b"n_const.fingerprint.v1"
+"""Identifier of the algorithm of ``DataClass.fingerprint``."""
+_FINGERPRINT = object()
+
+
+def _format_float(value: float) -> str:
+    if math.isnan(value):
+        return "nan"
+    # Round to 12 significant digits, to absorb errors of unit conversion.
+    return format(value + 0.0, ".11e")
+
+
+def _canonical(value: Any) -> bytes:
+    """Unambiguous byte representation of a parameter value."""
+    if value is None:
+        return b"N;"
+    if isinstance(value, (bool, np.bool_)):
+        return b"B1;" if value else b"B0;"
+    if isinstance(value, Integral):
+        return f"I{int(value)};".encode()
+    if isinstance(value, Real):
+        return f"F{_format_float(float(value))};".encode()
+    if isinstance(value, str):
+        encoded = str(value).encode("utf-8")
+        return b"S%d:%s;" % (len(encoded), encoded)
+    if isinstance(value, Quantity):
+        si = value.si
+        unit = si.unit.to_string().encode("utf-8")
+        return b"Q%d:%s%s" % (len(unit), unit, _canonical(np.asarray(si.value)))
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind not in "biuf":
+            raise TypeError(f"Cannot fingerprint array of dtype {value.dtype}")
+        shape = ",".join(map(str, value.shape)).encode()
+        items = (_canonical(x) for x in value.ravel().tolist())
+        return b"A%s:%s;" % (shape, b"".join(items))
+    if isinstance(value, (list, tuple)):
+        return b"L%d:%s;" % (len(value), b"".join(map(_canonical, value)))
+    if isinstance(value, (dict, DataClass)):
+        items = sorted(_canonical(k) + _canonical(v) for k, v in value.items())
+        return b"D%d:%s;" % (len(items), b"".join(items))
+    raise TypeError(f"Cannot fingerprint value of type {type(value).__name__}")
+
+
+class derived_property:
+    """Declare a value derived from parameters of DataClass.
+
+    The value is computed on first access and cached, until any of the parameters
+    it depends on is changed via attribute or key assignment or dict methods. The
+    value itself is read-only.
+
+    Parameters
+    ----------
+    depends_on
+        Names of the parameters the value is computed from.
+
+    Examples
+    --------
+    >>> class Rectangle(DataClass):
+    ...     @derived_property("width", "height")
+    ...     def area(self):
+    ...         return self.width * self.height
+    >>> rect = Rectangle(width=2, height=3, color="red")
+    >>> rect.area
+    6
+    >>> rect.color = "blue"  # Cached value is reused.
+    >>> rect.width = 5  # Cached value is discarded.
+    >>> rect.area
+    15
+
+    """
+
+    def __init__(self, *depends_on: Hashable) -> None:
+        self.depends_on = frozenset(depends_on)
+
+    def __call__(self, func: Callable[[Any], Any]) -> "derived_property":
+        self.func = func
+        self.__doc__ = func.__doc__
+        return self
+
+    def __set_name__(self, owner: Type[DataClass], name: str) -> None:
+        self.name = name
+        owner._derived_dependencies = {
+            **owner._derived_dependencies,
+            name: self.depends_on,
+        }
+
+    def __get__(self, instance: Optional[DataClass], owner: Type[DataClass]) -> Any:
+        if instance is None:
+            return self
+        try:
+            cache = instance._derived
+        except AttributeError:
+            cache = {}
+            object.__setattr__(instance, "_derived", cache)
+        try:
+            return cache[self.name]
+        except KeyError:
+            value = cache[self.name] = self.func(instance)
+            return value
+
+    def __set__(self, instance: DataClass, value: Any) -> None:
+        raise AttributeError(f"Derived value {self.name!r} is read-only.")
+
+    def __delete__(self, instance: DataClass) -> None:
+        raise AttributeError(f"Derived value {self.name!r} is read-only.")
+
+
+T = TypeVar("T", bound=DataClass)
+
+
+def _clone(data: DataClass, cls: Type[T]) -> T:
+    """Shallow copy of ``data`` as an instance of ``cls``, without running its
+    constructor, which may convert the values again."""
+    new = cls.__new__(cls)
+    new.__dict__.update(data.__dict__)
+    return new
+
+
+class _Frozen:
+    """Mixin which disables all mutating methods of DataClass."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs) -> None:
+        raise TypeError(f"{self.__class__.__name__} snapshot is read-only.")
+
+    __setattr__ = __delattr__ = __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = update = _readonly
+
+    def copy(self) -> DataClass:
+        """Mutable copy of this snapshot."""
+        return _clone(self, _mutable_class(self.__class__))
+
+    def __reduce__(self):
+        return _freeze, (self.copy(),)
+
+
+@lru_cache(maxsize=None)
+def _frozen_class(cls: Type[T]) -> Type[T]:
+    namespace = {"__slots__": (), "__module__": cls.__module__}
+    return type(cls.__name__, (_Frozen, cls), namespace)
+
+
+def _mutable_class(cls: Type[T]) -> Type[T]:
+    """The class ``cls`` is a frozen variant of, or ``cls`` itself."""
+    return cls.__bases__[1] if issubclass(cls, _Frozen) else cls
+
+
+def _freeze(data: T) -> T:
+    cls = type(data)
+    if issubclass(cls, _Frozen):
+        return data
+    return _clone(data, _frozen_class(cls))
+
+
+class Versioned(Generic[T]):
+    """Container which shares DataClass among threads via immutable snapshots.
+
+    Readers get the latest published snapshot without taking any lock. Writers edit
+    a private copy and publish it at once, so readers never see partially updated
+    parameters. Values are shared between snapshots, so they shouldn't be modified
+    in place.
+
+    Parameters
+    ----------
+    data
+        Initial parameters. It's copied, so later modification to it won't be
+        visible via this container.
+
+    Examples
+    --------
+    >>> params = Versioned(DataClass(a=1, b=2))
+    >>> params.snapshot
+    DataClass(a=1, b=2)
+    >>> with params.edit() as draft:
+    ...     draft.a = 10
+    ...     draft["b"] = 20
+    >>> params.snapshot
+    DataClass(a=10, b=20)
+    >>> params.version
+    1
+    >>> params.changed_since(0)
+    True
+
+    """
+
+    def __init__(self, data: T) -> None:
+        self._lock = threading.Lock()
+        self._state: Tuple[int, T] = (0, _freeze(data))
+
+    def __repr__(self) -> str:
+        version, snapshot = self._state
+        return f"{self.__class__.__name__}(version={version}, {snapshot!r})"
+
+    @property
+    def snapshot(self) -> T:
+        """Latest published parameters, which cannot be modified."""
+        return self._state[1]
+
+    @property
+    def version(self) -> int:
+        """Number of publications so far."""
+        return self._state[0]
+
+    def read(self) -> Tuple[int, T]:
+        """Consistent pair of version and snapshot."""
+        return self._state
+
+    def changed_since(self, version: int) -> bool:
+        """Whether newer parameters than ``version`` have been published."""
+        return self._state[0] != version
+
+    @contextmanager
+    def edit(self) -> Iterator[T]:
+        """Batch mutations and publish them on exit.
+
+        Writers are serialized. Nothing is published if an exception is raised in
+        the block, or if no value is changed.
+
+        """
+        with self._lock:
+            version, current = self._state
+            draft = current.copy()
+            yield draft
+            if _modified(current.__dict__, draft.__dict__):
+                self._state = (version + 1, _freeze(draft))
+
+    def publish(self, data: T) -> int:
+        """Replace the whole parameters, then return the new version."""
+        with self._lock:
+            version = self._state[0] + 1
+            self._state = (version, _freeze(data))
+            return version
+
+
+def _modified(old: Dict[Hashable, Any], new: Dict[Hashable, Any]) -> bool:
+    if old.keys() != new.keys():
+        return True
+    return any(new[k] is not v for k, v in old.items())
@@ -55,8 +55,8 @@ class Constants(DataClass):
 
         .. deprecated:: 1.0.1
 
-            ``from_csv`` will be removed in N-CONST 2.0.0, the successor won't be
-            implemented because resolving paths to config files can be problematic.
+            ``from_csv`` will be removed in N-CONST 2.0.0, use
+            ``n_const.table.ConfigTable.from_csv`` instead.
 
         Parameters
         ----------
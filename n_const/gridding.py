@@ -0,0 +1,245 @@
+"""Grid OTF spectra onto a regular map.
+
+Convolution weights between all map pixels and sample positions are computed only
+once, as a sparse matrix in compressed row format. Spectra are then gridded in
+channel chunks, so memory consumption is bounded regardless of number of channels.
+
+"""
+
+__all__ = ["OTFGridder"]
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import astropy.units as u
+import numpy as np
+
+from .obsparams import ObsParams
+
+FWHM2SIGMA = 1 / np.sqrt(8 * np.log(2))
+
+
+class OTFGridder:
+    """Convolve spectra sampled at arbitrary positions onto a regular map.
+
+    Samples are hashed into cells as large as the kernel support, so neighbours of
+    each pixel are searched only in the adjacent cells.
+
+    Parameters
+    ----------
+    x, y
+        Positions of the samples in the map frame, offset from the map center.
+    shape
+        Number of pixels along y and x axes.
+    pixel_size
+        Spacing of the map pixels.
+    kernel_fwhm
+        Full width at half maximum of the Gaussian convolution kernel. Defaults to
+        ``pixel_size``.
+    support
+        Radius beyond which samples don't contribute to a pixel. Defaults to
+        ``kernel_fwhm``.
+
+    Examples
+    --------
+    >>> gridder = OTFGridder.from_obsparams(params, x, y)
+    >>> cube = gridder.grid(spectra)  # ``spectra`` in shape (samples, channels)
+    >>> cube.shape  # (channels, y, x)
+    (32768, 30, 101)
+
+    """
+
+    def __init__(
+        self,
+        x: u.Quantity,
+        y: u.Quantity,
+        shape: Tuple[int, int],
+        pixel_size: u.Quantity,
+        kernel_fwhm: Optional[u.Quantity] = None,
+        support: Optional[u.Quantity] = None,
+    ) -> None:
+        self.shape = tuple(shape)
+        self.pixel_size = pixel_size.to(u.arcsec)
+        self.kernel_fwhm = (pixel_size if kernel_fwhm is None else kernel_fwhm).to(
+            u.arcsec
+        )
+        self.support = (self.kernel_fwhm if support is None else support).to(u.arcsec)
+        x = np.ravel(x.to_value(u.arcsec))
+        y = np.ravel(y.to_value(u.arcsec))
+        if x.shape != y.shape:
+            raise ValueError("Shapes of x and y don't match.")
+        self.n_samples = len(x)
+        self.indptr, self.indices, self.weights = self._build_matrix(x, y)
+
+    @classmethod
+    def from_obsparams(
+        cls,
+        params: ObsParams,
+        x: u.Quantity,
+        y: u.Quantity,
+        pixel_size: Optional[u.Quantity] = None,
+        **kwargs,
+    ) -> "OTFGridder":
+        """Map geometry declared in observation parameters.
+
+        Parameters
+        ----------
+        params
+            Observation parameters of the OTF map.
+        x, y
+            Positions of the samples in ``COORD_SYS``, offset from the map center.
+            They are rotated by ``position_angle`` to get the map frame.
+        pixel_size
+            Spacing of the map pixels. Defaults to ``grid`` parameter if declared,
+            otherwise ``scan_spacing``.
+        kwargs
+            Other keyword arguments passed to the class constructor.
+
+        """
+        if pixel_size is None:
+            pixel_size = params.get("grid", params.scan_spacing)
+        pixel_size = u.Quantity(pixel_size, u.arcsec)
+        along, across = params.map_extent.to_value(u.arcsec)
+        if str(params.get("SCAN_DIRECTION", "X")).upper() == "Y":
+            along, across = across, along
+        pixels = np.round(np.array([across, along]) / pixel_size.value).astype(int)
+
+        pa = params.get("position_angle", 0 * u.deg).to_value(u.rad)
+        x, y = u.Quantity(x, u.arcsec), u.Quantity(y, u.arcsec)
+        x, y = x * np.cos(pa) + y * np.sin(pa), -x * np.sin(pa) + y * np.cos(pa)
+        return cls(x, y, tuple(pixels + 1), pixel_size, **kwargs)
+
+    @property
+    def x(self) -> u.Quantity:
+        """Positions of pixel centers along x axis."""
+        return self._axis(self.shape[1])
+
+    @property
+    def y(self) -> u.Quantity:
+        """Positions of pixel centers along y axis."""
+        return self._axis(self.shape[0])
+
+    def _axis(self, n: int) -> u.Quantity:
+        return (np.arange(n) - (n - 1) / 2) * self.pixel_size
+
+    def _build_matrix(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ny, nx = self.shape
+        pixel = self.pixel_size.value
+        support = self.support.value
+        sigma = self.kernel_fwhm.value * FWHM2SIGMA
+
+        # Hash samples into cells of size ``support``, covering the whole map.
+        x0, y0 = self.x[0].value - support, self.y[0].value - support
+        n_cx = int((nx - 1) * pixel // support) + 3
+        n_cy = int((ny - 1) * pixel // support) + 3
+        cx = np.floor((x - x0) / support).astype(np.int64)
+        cy = np.floor((y - y0) / support).astype(np.int64)
+        inside = (cx >= 0) & (cx < n_cx) & (cy >= 0) & (cy < n_cy)
+        samples = np.flatnonzero(inside)
+        keys = cy[samples] * n_cx + cx[samples]
+        order = np.argsort(keys, kind="stable")
+        samples, keys = samples[order], keys[order]
+        cell_start = np.searchsorted(keys, np.arange(n_cx * n_cy + 1))
+
+        px, py = np.meshgrid(self.x.value, self.y.value)
+        px, py = px.ravel(), py.ravel()
+        pcx = np.floor((px - x0) / support).astype(np.int64)
+        pcy = np.floor((py - y0) / support).astype(np.int64)
+
+        rows, cols, weights = [], [], []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                cell = (pcy + dy) * n_cx + (pcx + dx)
+                start, stop = cell_start[cell], cell_start[cell + 1]
+                count = stop - start
+                row = np.repeat(np.arange(len(cell)), count)
+                offset = np.arange(count.sum()) - np.repeat(
+                    np.cumsum(count) - count, count
+                )
+                col = samples[np.repeat(start, count) + offset]
+                r2 = (x[col] - px[row]) ** 2 + (y[col] - py[row]) ** 2
+                near = r2 <= support**2
+                rows.append(row[near])
+                cols.append(col[near])
+                weights.append(np.exp(-r2[near] / (2 * sigma**2)))
+
+        rows, cols, weights = map(np.concatenate, (rows, cols, weights))
+        order = np.lexsort((cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        weights /= np.bincount(rows, weights, minlength=nx * ny)[rows]
+        indptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=nx * ny))]
+        return indptr, cols, weights
+
+    @property
+    def coverage(self) -> np.ndarray:
+        """Number of samples contributing to each pixel, in shape (y, x)."""
+        return np.diff(self.indptr).reshape(self.shape)
+
+    def grid(
+        self,
+        spectra: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        memory_limit: int = 1 << 28,
+    ) -> np.ndarray:
+        """Grid spectra, each of which corresponds to a sample position.
+
+        Parameters
+        ----------
+        spectra
+            Array of shape (samples, channels), can be a memory map.
+        out
+            Array of shape (channels, y, x) to store the result in.
+        chunk_size
+            Number of channels processed at once. If not specified, determined from
+            ``memory_limit``.
+        max_workers
+            Number of threads to process channel chunks in parallel.
+        memory_limit
+            Approximate upper limit of working memory per thread, in bytes, used to
+            determine ``chunk_size``.
+
+        Returns
+        -------
+        cube
+            Gridded spectra, in shape (channels, y, x). Pixels without any sample
+            within the kernel support are filled with NaN.
+
+        """
+        if spectra.ndim != 2 or len(spectra) != self.n_samples:
+            raise ValueError(f"Shape of spectra should be ({self.n_samples}, channels)")
+        n_channels = spectra.shape[1]
+        if out is None:
+            out = np.empty((n_channels, *self.shape))
+        flat = out.reshape(n_channels, -1)
+        nnz = len(self.weights)
+        if chunk_size is None:
+            chunk_size = max(1, (memory_limit - 16 * nnz) // (8 * self.n_samples))
+
+        nonempty = np.flatnonzero(np.diff(self.indptr))
+        flat[:, np.diff(self.indptr) == 0] = np.nan
+        starts = self.indptr[nonempty]
+
+        def _grid_chunk(start: int) -> None:
+            stop = min(start + chunk_size, n_channels)
+            block = np.ascontiguousarray(spectra[:, start:stop].T, dtype=float)
+            gathered, reduced = np.empty(nnz), np.empty(len(nonempty))
+            for channel, spectrum in enumerate(block, start):
+                spectrum.take(self.indices, out=gathered)
+                gathered *= self.weights
+                np.add.reduceat(gathered, starts, out=reduced)
+                flat[channel, nonempty] = reduced
+
+        chunks = range(0, n_channels, chunk_size)
+        if len(nonempty) == 0:
+            pass
+        elif max_workers is None:
+            for start in chunks:
+                _grid_chunk(start)
+        else:
+            with ThreadPoolExecutor(max_workers) as executor:
+                list(executor.map(_grid_chunk, chunks))
+        return out
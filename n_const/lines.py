@@ -0,0 +1,251 @@
+"""Catalog of spectral lines, searchable by frequency.
+
+Rest frequencies are kept in a sorted array, so lines in any number of frequency
+windows are found by binary search, all at once.
+
+"""
+
+__all__ = ["LineCatalog"]
+
+import csv
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import astropy.constants as const
+import astropy.units as u
+import numpy as np
+
+from .deprecated import Constants
+
+DEFAULT_CATALOG = Path(__file__).with_name("line_catalog.csv")
+"""Lines frequently observed with our telescopes. Frequencies of CO lines are the
+same as ``REST_FREQ`` [Ref. ISBN978-4-535-60766-8], others are taken from CDMS and
+JPL catalogs."""
+
+
+class LineCatalog:
+    """Spectral lines sorted by rest frequency.
+
+    Parameters
+    ----------
+    names
+        Unique identifiers of the lines, e.g. ``"j10_12co"``.
+    species
+        Name of the molecules or atoms.
+    transitions
+        Description of the transitions.
+    frequency
+        Rest frequencies of the lines.
+
+    Examples
+    --------
+    >>> catalog = LineCatalog.default()
+    >>> catalog["j21_12co"]
+    <Quantity 230.538 GHz>
+    >>> start, stop = catalog.in_band(
+    ...     [225, 225] * u.GHz, 4 * u.GHz, 6 * u.GHz, ["LSB", "USB"]
+    ... )
+    >>> catalog[start[0] : stop[0]].names
+    array(['j21_c18o', 'so_65_54', 'j21_13co'], dtype='<U12')
+    >>> catalog[start[1] : stop[1]].names
+    array(['j21_12co'], dtype='<U12')
+
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        species: Sequence[str],
+        transitions: Sequence[str],
+        frequency: u.Quantity,
+    ) -> None:
+        frequency = u.Quantity(frequency, u.GHz, dtype=float)
+        order = np.argsort(frequency.value, kind="stable")
+        self.names = self._readonly(np.asarray(names, dtype=str)[order])
+        self.species = self._readonly(np.asarray(species, dtype=str)[order])
+        self.transitions = self._readonly(np.asarray(transitions, dtype=str)[order])
+        self._frequency = self._readonly(frequency.value[order])
+        if not (
+            len(self.names)
+            == len(self.species)
+            == len(self.transitions)
+            == len(self._frequency)
+        ):
+            raise ValueError("Columns have inconsistent lengths.")
+        self._loc = {name: i for i, name in enumerate(self.names.tolist())}
+        if len(self._loc) != len(self.names):
+            raise ValueError("Names of the lines are not unique.")
+
+    @staticmethod
+    def _readonly(array: np.ndarray) -> np.ndarray:
+        array.flags.writeable = False
+        return array
+
+    @classmethod
+    def from_file(cls, path: os.PathLike) -> "LineCatalog":
+        """Read catalog file.
+
+        Parameters
+        ----------
+        path
+            Path to ``.npz`` file written by :meth:`save`, or CSV file with columns
+            ``name``, ``species``, ``transition`` and ``frequency`` in [GHz].
+
+        """
+        path = Path(path)
+        if path.suffix == ".npz":
+            with np.load(path) as f:
+                columns = [f[k] for k in ("name", "species", "transition", "frequency")]
+        else:
+            with path.open("r", newline="") as f:
+                reader = csv.DictReader(f, skipinitialspace=True)
+                rows = [row for row in reader]
+            columns = [
+                [row[k] for row in rows]
+                for k in ("name", "species", "transition", "frequency")
+            ]
+            columns[3] = np.array(columns[3], dtype=float)
+        return cls(*columns[:3], columns[3] * u.GHz)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def default(cls) -> "LineCatalog":
+        """Catalog bundled with this package."""
+        return cls.from_file(DEFAULT_CATALOG)
+
+    def save(self, path: os.PathLike) -> None:
+        """Write the catalog in compressed ``.npz`` format."""
+        np.savez_compressed(
+            path,
+            name=self.names,
+            species=self.species,
+            transition=self.transitions,
+            frequency=self._frequency,
+        )
+
+    @property
+    def frequency(self) -> u.Quantity:
+        """Rest frequencies of the lines, in ascending order."""
+        return self._frequency * u.GHz
+
+    def __len__(self) -> int:
+        return len(self._frequency)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} lines)"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loc
+
+    def __getitem__(
+        self, key: Union[str, slice, Sequence[int], np.ndarray]
+    ) -> Union[u.Quantity, "LineCatalog"]:
+        """Rest frequency of a line if ``key`` is its name, otherwise a catalog of
+        the lines selected by ``key`` as index."""
+        if isinstance(key, str):
+            return self._frequency[self._loc[key]] * u.GHz
+        if isinstance(key, (int, np.integer)):
+            key = [key]
+        return self.__class__(
+            self.names[key],
+            self.species[key],
+            self.transitions[key],
+            self._frequency[key] * u.GHz,
+        )
+
+    def search(
+        self, lower: u.Quantity, upper: u.Quantity
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Lines with rest frequency in range ``[lower, upper]``.
+
+        Parameters
+        ----------
+        lower, upper
+            Bounds of the frequency windows, scalars or arrays of any broadcastable
+            shapes.
+
+        Returns
+        -------
+        start, stop
+            Lines in the ``i``-th window are ``catalog[start[i] : stop[i]]``.
+
+        """
+        lower, upper = np.broadcast_arrays(
+            u.Quantity(lower, u.GHz).value, u.Quantity(upper, u.GHz).value
+        )
+        start = np.searchsorted(self._frequency, lower, side="left")
+        stop = np.searchsorted(self._frequency, upper, side="right")
+        return start, np.maximum(start, stop)
+
+    def nearest(self, frequency: u.Quantity) -> Tuple[np.ndarray, u.Quantity]:
+        """Lines closest to ``frequency`` in rest frequency.
+
+        Returns
+        -------
+        index
+            Index of the nearest lines.
+        separation
+            Rest frequency of the nearest lines minus ``frequency``.
+
+        """
+        if len(self) == 0:
+            raise ValueError("Catalog is empty.")
+        frequency = u.Quantity(frequency, u.GHz).value
+        right = np.clip(np.searchsorted(self._frequency, frequency), 1, len(self) - 1)
+        left = right - 1
+        if len(self) == 1:
+            right = left = np.zeros_like(right)
+        closer = np.abs(self._frequency[left] - frequency) <= np.abs(
+            self._frequency[right] - frequency
+        )
+        index = np.where(closer, left, right)
+        return index, (self._frequency[index] - frequency) * u.GHz
+
+    def in_band(
+        self,
+        lo: u.Quantity,
+        if_lower: u.Quantity,
+        if_upper: u.Quantity,
+        sideband: Union[str, Iterable[str]],
+        vlsr: u.Quantity = 0 * u.km / u.s,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Lines which fall in an IF window, for given LO frequency and sideband.
+
+        All parameters can be arrays of broadcastable shapes, to query many tunings at
+        once.
+
+        Parameters
+        ----------
+        lo
+            Frequency of the local oscillator.
+        if_lower, if_upper
+            Bounds of the IF window.
+        sideband
+            ``"USB"`` or ``"LSB"``, only the first letter is checked so ``"U"`` and
+            ``"L"`` are also accepted.
+        vlsr
+            Radial velocity of the source, in radio definition.
+
+        Returns
+        -------
+        start, stop
+            Lines in the ``i``-th window are ``catalog[start[i] : stop[i]]``.
+
+        """
+        lo = u.Quantity(lo, u.GHz).value
+        if_lower = u.Quantity(if_lower, u.GHz).value
+        if_upper = u.Quantity(if_upper, u.GHz).value
+        upper_sideband = np.char.startswith(
+            np.char.upper(np.asarray(sideband, dtype=str)), "U"
+        )
+        lower = np.where(upper_sideband, lo + if_lower, lo - if_upper)
+        upper = np.where(upper_sideband, lo + if_upper, lo - if_lower)
+        doppler = 1 - (u.Quantity(vlsr, u.km / u.s) / const.c).to_value(u.one)
+        return self.search(lower / doppler * u.GHz, upper / doppler * u.GHz)
+
+    def to_constants(self, names: Optional[Iterable[str]] = None) -> Constants:
+        """Rest frequencies of the lines, as ``Constants`` keyed by name."""
+        names = self.names.tolist() if names is None else names
+        return Constants(**{name: self[name] for name in names})
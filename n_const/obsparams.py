@@ -1,16 +1,18 @@
 __all__ = ["obsfile_parser", "ObsParams"]
 
 import importlib
+import math
 import os
 import re
 from pathlib import Path
 from typing import Dict, Any
 
+import astropy.units as u
 from astropy.coordinates import Angle
 from astropy.units.quantity import Quantity
 from tomlkit.toml_file import TOMLFile
 
-from .data_format import DataClass
+from .data_format import DataClass, derived_property
 
 
 def obsfile_parser(path: os.PathLike) -> Dict[str, Any]:
@@ -45,7 +47,12 @@ def obsfile_parser(path: os.PathLike) -> Dict[str, Any]:
 
 
 class ObsParams(DataClass):
-    """Parse observation parameters."""
+    """Parse observation parameters.
+
+    Quantities derived from the parameters, such as ``on_source_time``, are computed
+    on first access and cached until the parameters they depend on are changed.
+
+    """
 
     def __init__(self, **kwargs):
         """Make Quantity.
@@ -90,3 +97,31 @@ class ObsParams(DataClass):
             else:
                 parsed[name] = Angle(value)
         return parsed
+
+    @derived_property("n")
+    def n_scan(self) -> int:
+        """Number of scan lines."""
+        return int(self.n)
+
+    @derived_property("scan_length", "integ_on")
+    def n_points_per_scan(self) -> int:
+        """Number of integrations in a scan line."""
+        return round((self.scan_length / self.integ_on).to_value(""))
+
+    @derived_property("n", "scan_length", "scan_velocity", "scan_spacing")
+    def map_extent(self) -> Quantity:
+        """Size of the map along and across the scan direction."""
+        along = self.scan_length * self.scan_velocity
+        across = (self.n_scan - 1) * self.scan_spacing
+        return u.Quantity([along, across]).to(u.arcsec)
+
+    @derived_property("n", "scan_length")
+    def on_source_time(self) -> Quantity:
+        """Total time spent on scan lines."""
+        return (self.n_scan * self.scan_length).to(u.s)
+
+    @derived_property("n", "off_interval")
+    def n_off(self) -> int:
+        """Number of OFF point measurements, which are done every ``off_interval``
+        scan lines."""
+        return math.ceil(self.n_scan / int(self.off_interval))
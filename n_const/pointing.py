@@ -26,7 +26,7 @@ Pointing error is corrected by the following equation:
 __all__ = ["PointingError"]
 
 import os
-from typing import Any, Dict
+from typing import Any, Dict, NamedTuple, Tuple
 
 try:
     from typing import Annotated
@@ -34,11 +34,95 @@ except ImportError:
     from typing_extensions import Annotated  # For Python<3.9
 
 import astropy.units as u
+import numpy as np
 from tomlkit.toml_file import TOMLFile
 
 from .data_format import DataClass
 
 
+class _Coefficients(NamedTuple):
+    """Pointing error parameters as bare floats, angles in [rad] and others in
+    [arcsec]."""
+
+    dAz: float
+    de: float
+    chi_Az: float
+    omega_Az: float
+    eps: float
+    chi2_Az: float
+    omega2_Az: float
+    chi_El: float
+    omega_El: float
+    chi2_El: float
+    omega2_El: float
+    g: float
+    gg: float
+    dEl: float
+    de_radio: float
+    dEl_radio: float
+    cor_v: float
+    cor_p: float
+    g_radio: float
+    gg_radio: float
+
+
+def _offset_kernel(
+    c: _Coefficients,
+    az: np.ndarray,
+    el: np.ndarray,
+    d_az: np.ndarray,
+    d_el: np.ndarray,
+    work: Tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> None:
+    """Evaluate the pointing error equation in place.
+
+    ``az`` and ``el`` are in [rad], ``d_az`` and ``d_el`` are filled in [arcsec].
+    ``work`` is 3 scratch arrays of the same shape, so no temporary array is
+    allocated.
+
+    """
+    sin_el, cos_el, tmp = work
+    np.sin(el, out=sin_el)
+    np.cos(el, out=cos_el)
+
+    np.subtract(c.omega_Az, az, out=tmp)
+    np.sin(tmp, out=tmp)
+    np.multiply(tmp, c.chi_Az, out=d_az)
+    np.subtract(c.omega2_Az, az, out=tmp)
+    tmp *= 2
+    np.sin(tmp, out=tmp)
+    tmp *= c.chi2_Az
+    d_az += tmp
+    d_az += c.eps
+    d_az *= sin_el
+    np.multiply(cos_el, c.dAz, out=tmp)
+    d_az += tmp
+    d_az += c.de + c.de_radio
+    np.add(el, c.cor_p, out=tmp)
+    np.cos(tmp, out=tmp)
+    tmp *= c.cor_v
+    d_az += tmp
+    d_az /= cos_el
+
+    np.subtract(c.omega_El, az, out=tmp)
+    np.cos(tmp, out=tmp)
+    np.multiply(tmp, -c.chi_El, out=d_el)
+    np.subtract(c.omega2_El, az, out=tmp)
+    tmp *= 2
+    np.cos(tmp, out=tmp)
+    tmp *= c.chi2_El
+    d_el -= tmp
+    np.multiply(cos_el, c.g + c.g_radio, out=tmp)
+    d_el += tmp
+    np.multiply(sin_el, c.gg + c.gg_radio, out=tmp)
+    d_el += tmp
+    d_el += c.dEl + c.dEl_radio
+    np.add(el, c.cor_p, out=tmp)
+    np.sin(tmp, out=tmp)
+    tmp *= c.cor_v
+    d_el -= tmp
+
+
 class PointingError(DataClass):
     """Errors of telescope and its system installation.
 
@@ -125,3 +209,50 @@ class PointingError(DataClass):
         """
         params = TOMLFile(path).read()
         return cls(**params[key])
+
+    def _coefficients(self) -> _Coefficients:
+        values = {}
+        for name in _Coefficients._fields:
+            value = self[name]
+            if value.unit is u.dimensionless_unscaled:
+                # Gravitational terms are added to offsets in [arcsec] as they are.
+                values[name] = float(value.value)
+            elif self.__annotations__[name].__metadata__[0] is u.deg:
+                values[name] = float(value.to_value(u.rad))
+            else:
+                values[name] = float(value.to_value(u.arcsec))
+        return _Coefficients(**values)
+
+    def offset(self, az: u.Quantity, el: u.Quantity) -> Tuple[u.Quantity, u.Quantity]:
+        """Pointing error at given encoder readings.
+
+        Parameters
+        ----------
+        az
+            Azimuth, scalar or array of angles.
+        el
+            Elevation, in the same shape as ``az``.
+
+        Returns
+        -------
+        d_az, d_el
+            :math:`\\Delta Az` and :math:`\\Delta El` in the equation above.
+
+        Examples
+        --------
+        >>> params = PointingError.from_file("tests/hosei_230.toml")
+        >>> d_az, d_el = params.offset([0, 90] * u.deg, [30, 60] * u.deg)
+        >>> d_az
+        <Quantity [5328.22188211, 5356.20852771] arcsec>
+        >>> d_el
+        <Quantity [6760.2026678 , 6709.09066427] arcsec>
+
+        """
+        az, el = np.broadcast_arrays(
+            u.Quantity(az, u.rad, dtype=float).value,
+            u.Quantity(el, u.rad, dtype=float).value,
+        )
+        d_az, d_el = np.empty(az.shape), np.empty(az.shape)
+        work = tuple(np.empty(az.shape) for _ in range(3))
+        _offset_kernel(self._coefficients(), az, el, d_az, d_el, work)
+        return d_az * u.arcsec, d_el * u.arcsec
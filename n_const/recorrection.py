@@ -0,0 +1,191 @@
+"""Re-apply pointing error correction to archived encoder logs.
+
+Encoder logs can be far larger than memory, so they are read through memory maps and
+processed chunk by chunk, reusing preallocated buffers.
+
+"""
+
+__all__ = ["recorrect"]
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .pointing import PointingError, _Coefficients, _offset_kernel
+
+_Buffers = Tuple[np.ndarray, ...]
+_buffers: Dict[int, _Buffers] = {}
+"""Buffers allocated in this process, keyed by chunk size."""
+
+
+def _get_buffers(chunk_size: int) -> _Buffers:
+    if chunk_size not in _buffers:
+        _buffers.clear()
+        _buffers[chunk_size] = tuple(np.empty(chunk_size) for _ in range(7))
+    return _buffers[chunk_size]
+
+
+def _open_column(
+    path: os.PathLike, mode: str, dtype: np.dtype, shape: Optional[int] = None
+) -> np.ndarray:
+    path = Path(path)
+    if path.suffix == ".npy":
+        if mode == "w+":
+            return np.lib.format.open_memmap(path, mode, dtype=dtype, shape=(shape,))
+        return np.load(path, mmap_mode=mode)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+def _process_chunk(
+    coefficients: _Coefficients,
+    columns: Tuple[Path, Path, Path, Path],
+    dtype: np.dtype,
+    chunk_size: int,
+    chunk: int,
+) -> int:
+    az_in, el_in, az_out, el_out = (
+        _open_column(path, "r" if i < 2 else "r+", dtype)
+        for i, path in enumerate(columns)
+    )
+    start = chunk * chunk_size
+    stop = min(start + chunk_size, len(az_in))
+    n = stop - start
+    az, el, d_az, d_el, *work = (buf[:n] for buf in _get_buffers(chunk_size))
+
+    np.radians(az_in[start:stop], out=az)
+    np.radians(el_in[start:stop], out=el)
+    _offset_kernel(coefficients, az, el, d_az, d_el, work)
+    d_az /= 3600
+    d_el /= 3600
+    np.subtract(az_in[start:stop], d_az, out=az_out[start:stop])
+    np.subtract(el_in[start:stop], d_el, out=el_out[start:stop])
+    for column in (az_out, el_out):
+        column.flush()
+    return chunk
+
+
+def _file_stat(path: os.PathLike) -> List[int]:
+    """Size and modification time of the file, to detect rewritten inputs."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class _Progress:
+    """Record of processed chunks, persisted in a JSON file."""
+
+    def __init__(self, path: Path, metadata: Dict[str, object], resume: bool) -> None:
+        self.path = path
+        self.metadata = metadata
+        self.done = set()
+        if resume and path.exists():
+            recorded = json.loads(path.read_text())
+            if recorded.get("metadata") == metadata:
+                self.done = set(recorded["done"])
+
+    def add(self, chunk: int) -> None:
+        self.done.add(chunk)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"metadata": self.metadata, "done": sorted(self.done)})
+        )
+        os.replace(tmp, self.path)
+
+
+def recorrect(
+    az: os.PathLike,
+    el: os.PathLike,
+    output_dir: os.PathLike,
+    params: PointingError,
+    *,
+    chunk_size: int = 1 << 20,
+    processes: Optional[int] = None,
+    resume: bool = True,
+    dtype: np.dtype = np.float64,
+) -> Tuple[Path, Path]:
+    """Correct encoder readings for pointing error given by ``params``.
+
+    Parameters
+    ----------
+    az
+        Path to encoder readings of azimuth in [deg]. Either ``.npy`` file or raw
+        binary file of ``dtype``.
+    el
+        Path to encoder readings of elevation, in the same format as ``az``.
+    output_dir
+        Directory to write the corrected columns to. Corrected azimuth and elevation
+        are written in ``az.npy`` and ``el.npy`` respectively.
+    params
+        Pointing error parameters.
+    chunk_size
+        Number of samples processed at once.
+    processes
+        Number of worker processes. If not specified, chunks are processed in this
+        process.
+    resume
+        If True and output of previous run with identical inputs exists, skip
+        chunks which have already been processed. Inputs are regarded as identical
+        if their paths, sizes, modification times and data type are the same.
+    dtype
+        Data type of raw binary inputs. Ignored for ``.npy`` files.
+
+    Returns
+    -------
+    az, el
+        Paths to the corrected columns.
+
+    Notes
+    -----
+    Corrected values are encoder readings with the pointing error subtracted, i.e.
+    :math:`Az - \\Delta Az` and :math:`El - \\Delta El` in the equation given in
+    :mod:`n_const.pointing`.
+
+    Examples
+    --------
+    >>> params = PointingError.from_file("path/to/new_pointing_param.toml")
+    >>> recorrect("log/az.npy", "log/el.npy", "corrected", params, processes=4)
+    (PosixPath('corrected/az.npy'), PosixPath('corrected/el.npy'))
+
+    """
+    az_in, el_in = _open_column(az, "r", dtype), _open_column(el, "r", dtype)
+    if az_in.shape != el_in.shape or az_in.ndim != 1:
+        raise ValueError("Azimuth and elevation should be 1D arrays of same length.")
+    length = len(az_in)
+    n_chunks = -(-length // chunk_size)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    az_out, el_out = output_dir / "az.npy", output_dir / "el.npy"
+    coefficients = params._coefficients()
+    metadata = {
+        "az": str(Path(az).resolve()),
+        "el": str(Path(el).resolve()),
+        "az_stat": _file_stat(az),
+        "el_stat": _file_stat(el),
+        "dtype": az_in.dtype.str,
+        "length": length,
+        "chunk_size": chunk_size,
+        "coefficients": list(coefficients),
+    }
+    progress = _Progress(output_dir / "progress.json", metadata, resume)
+    if not (progress.done and az_out.exists() and el_out.exists()):
+        progress.done.clear()
+        for path in (az_out, el_out):
+            _open_column(path, "w+", np.float64, length).flush()
+    todo: Iterable[int] = [i for i in range(n_chunks) if i not in progress.done]
+
+    columns = (Path(az), Path(el), az_out, el_out)
+    args = (coefficients, columns, az_in.dtype, chunk_size)
+    del az_in, el_in
+    if processes is None:
+        for chunk in todo:
+            progress.add(_process_chunk(*args, chunk))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            futures = [executor.submit(_process_chunk, *args, i) for i in todo]
+            for future in as_completed(futures):
+                progress.add(future.result())
+    return az_out, el_out
@@ -0,0 +1,242 @@
+"""Atmospheric refraction, combined with pointing error correction.
+
+Refraction is computed by the model used in ERFA (``eraRefco`` and ``eraAtioq``),
+which is also what astropy's ``AltAz`` frame uses. Its coefficients depend only on
+weather, so they're cached and reused while weather changes within tolerances.
+
+"""
+
+__all__ = ["Weather", "Refraction", "PointingCorrection"]
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import astropy.units as u
+import numpy as np
+
+try:
+    import erfa
+except ImportError:
+    from astropy import _erfa as erfa  # For astropy<4.2
+
+from .pointing import PointingError, _Coefficients, _offset_kernel
+
+SELMIN = 0.05
+"""Lower limit of sine of elevation, to avoid divergence near horizon."""
+CELMIN = 1e-6
+"""Lower limit of cosine of elevation."""
+
+
+class Weather(NamedTuple):
+    """Weather condition at the telescope."""
+
+    pressure: u.Quantity
+    """Atmospheric pressure."""
+    temperature: u.Quantity
+    """Ambient temperature."""
+    humidity: u.Quantity
+    """Relative humidity, in range 0-1."""
+
+
+def _refraction_kernel(
+    a: float,
+    b: float,
+    sin_el: np.ndarray,
+    cos_el: np.ndarray,
+    out: np.ndarray,
+    work: Tuple[np.ndarray, np.ndarray, np.ndarray],
+) -> None:
+    """Refraction in [rad], following ``eraAtioq``, computed without temporary
+    arrays."""
+    z, tz, w = work
+    np.maximum(sin_el, SELMIN, out=z)
+    np.maximum(cos_el, CELMIN, out=tz)
+    tz /= z
+    np.multiply(tz, tz, out=w)
+    w *= b
+    np.add(w, a, out=out)
+    out *= tz
+    w *= 3
+    w += a
+    w /= z
+    w /= z
+    w += 1
+    out /= w
+
+
+class Refraction:
+    """Atmospheric refraction model.
+
+    Parameters
+    ----------
+    wavelength
+        Observing wavelength. Radio model is used for wavelength longer than 100
+        micron, otherwise optical model is used.
+    tolerance
+        Changes of weather within which cached coefficients are reused.
+
+    Examples
+    --------
+    >>> refraction = Refraction.radio()
+    >>> weather = Weather(550 * u.hPa, 0 * u.deg_C, 0.2 * u.one)
+    >>> refraction([20, 45, 80] * u.deg, weather)
+    <Quantity [91.14266813, 33.45381898,  5.90616358] arcsec>
+
+    """
+
+    def __init__(
+        self,
+        wavelength: u.Quantity,
+        tolerance: Weather = Weather(0.5 * u.hPa, 0.5 * u.K, 0.02 * u.one),
+    ) -> None:
+        self.wavelength = wavelength.to(u.micron, equivalencies=u.spectral())
+        self.tolerance = tolerance
+        self._tolerance = (
+            tolerance.pressure.to_value(u.hPa),
+            tolerance.temperature.to_value(u.K),
+            tolerance.humidity.to_value(u.one),
+        )
+        self._coefficients: Dict[Tuple[int, int, int], Tuple[float, float]] = {}
+
+    @classmethod
+    def radio(cls, **kwargs) -> "Refraction":
+        """Refraction model for radio wavelength."""
+        return cls(1 * u.mm, **kwargs)
+
+    @classmethod
+    def optical(cls, **kwargs) -> "Refraction":
+        """Refraction model for optical wavelength."""
+        return cls(0.55 * u.micron, **kwargs)
+
+    def coefficients(self, weather: Weather) -> Tuple[float, float]:
+        """Coefficients A and B in [rad], for weather rounded to the tolerances.
+
+        Refraction in zenith distance is approximately
+        :math:`A \\tan z + B \\tan^3 z`.
+
+        """
+        pressure = weather.pressure.to_value(u.hPa)
+        temperature = weather.temperature.to_value(
+            u.deg_C, equivalencies=u.temperature()
+        )
+        humidity = weather.humidity.to_value(u.one)
+        key = tuple(
+            round(v / tol)
+            for v, tol in zip((pressure, temperature, humidity), self._tolerance)
+        )
+        if key not in self._coefficients:
+            if len(self._coefficients) > 1024:
+                self._coefficients.clear()
+            pressure, temperature, humidity = (
+                k * tol for k, tol in zip(key, self._tolerance)
+            )
+            a, b = erfa.refco(
+                pressure,
+                temperature,
+                min(max(humidity, 0), 1),
+                self.wavelength.value,
+            )
+            self._coefficients[key] = (float(a), float(b))
+        return self._coefficients[key]
+
+    def __call__(self, el: u.Quantity, weather: Weather) -> u.Quantity:
+        """Refraction at topocentric (unrefracted) elevation ``el``.
+
+        The observed elevation is ``el`` plus the returned value.
+
+        """
+        el = np.asarray(u.Quantity(el, u.rad, dtype=float).value)
+        out = np.empty(el.shape)
+        work = tuple(np.empty(el.shape) for _ in range(3))
+        a, b = self.coefficients(weather)
+        _refraction_kernel(a, b, np.sin(el), np.cos(el), out, work)
+        return (out * u.rad).to(u.arcsec)
+
+
+class PointingCorrection:
+    """Total correction of telescope pointing, refraction and pointing error.
+
+    Elevation is first shifted by refraction, then pointing error at the refracted
+    position is added. All terms are evaluated in a single pass over arrays, reusing
+    scratch buffers between calls, so an instance shouldn't be shared among
+    threads. Coefficients derived from ``pointing`` are cached, and recomputed when
+    its fingerprint changes, so modifications of the parameters take effect.
+
+    Parameters
+    ----------
+    pointing
+        Pointing error parameters.
+    refraction
+        Refraction model. If None, refraction isn't corrected.
+
+    Examples
+    --------
+    >>> correction = PointingCorrection(params, Refraction.radio())
+    >>> d_az, d_el = correction(az, el, weather)
+    >>> command_az, command_el = az + d_az, el + d_el
+
+    """
+
+    def __init__(
+        self, pointing: PointingError, refraction: Optional[Refraction] = None
+    ) -> None:
+        self.pointing = pointing
+        self.refraction = refraction
+        self._fingerprint: Optional[str] = None
+        self._buffers: Dict[Tuple[int, ...], Tuple[np.ndarray, ...]] = {}
+
+    def _pointing_coefficients(self) -> _Coefficients:
+        fingerprint = self.pointing.fingerprint()
+        if fingerprint != self._fingerprint:
+            self._coefficients = self.pointing._coefficients()
+            self._fingerprint = fingerprint
+        return self._coefficients
+
+    def _get_buffers(self, shape: Tuple[int, ...]) -> Tuple[np.ndarray, ...]:
+        if shape not in self._buffers:
+            self._buffers.clear()
+            self._buffers[shape] = tuple(np.empty(shape) for _ in range(6))
+        return self._buffers[shape]
+
+    def __call__(
+        self, az: u.Quantity, el: u.Quantity, weather: Optional[Weather] = None
+    ) -> Tuple[u.Quantity, u.Quantity]:
+        """Offsets to be added to topocentric ``az`` and ``el``.
+
+        Parameters
+        ----------
+        az, el
+            Topocentric (unrefracted) position of the target.
+        weather
+            Weather condition, required if refraction is corrected.
+
+        Returns
+        -------
+        d_az, d_el
+            Offsets in azimuth and elevation.
+
+        """
+        az, el = np.broadcast_arrays(
+            u.Quantity(az, u.rad, dtype=float).value,
+            u.Quantity(el, u.rad, dtype=float).value,
+        )
+        d_az, d_el = np.empty(az.shape), np.empty(az.shape)
+        observed_el, sin_el, cos_el, *work = self._get_buffers(az.shape)
+
+        if self.refraction is None:
+            refraction = np.zeros(az.shape)
+        else:
+            if weather is None:
+                raise ValueError("Weather is required to correct refraction.")
+            a, b = self.refraction.coefficients(weather)
+            np.sin(el, out=sin_el)
+            np.cos(el, out=cos_el)
+            refraction = np.empty(az.shape)
+            _refraction_kernel(a, b, sin_el, cos_el, refraction, work)
+        np.add(el, refraction, out=observed_el)
+
+        _offset_kernel(
+            self._pointing_coefficients(), az, observed_el, d_az, d_el, tuple(work)
+        )
+        refraction *= 180 * 3600 / np.pi
+        d_el += refraction
+        return d_az * u.arcsec, d_el * u.arcsec
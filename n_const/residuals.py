@@ -0,0 +1,372 @@
+"""Statistics of pointing residuals over large pointing archives.
+
+Records are streamed from files in chunks and reduced into running statistics per
+bin, so archives of any size are analyzed in bounded memory. Statistics are
+mergeable, hence files can be reduced in separate processes and combined afterwards.
+
+"""
+
+__all__ = ["RECORD_COLUMNS", "RunningStats", "ResidualStats", "read_records"]
+
+import copy
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import astropy.units as u
+import numpy as np
+from astropy.table import QTable
+
+from .pointing import PointingError, _offset_kernel
+
+RECORD_COLUMNS = ("time", "az", "el", "d_az", "d_el")
+"""Columns of pointing records; time, encoder readings in [deg] and measured
+pointing offsets in [arcsec]. Unit of time is arbitrary (e.g. MJD), but should be
+consistent with ``time_bins`` of :class:`ResidualStats`."""
+
+
+def read_records(
+    path: os.PathLike, chunk_size: int = 1 << 16
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Iterate over chunks of pointing records.
+
+    Parameters
+    ----------
+    path
+        Path to a CSV file with header row, or ``.npy`` file of structured array.
+        Both should contain (at least) columns listed in :data:`RECORD_COLUMNS`.
+        ``.npy`` file can also be a 2D array, whose columns are in that order.
+    chunk_size
+        Number of records per chunk.
+
+    Yields
+    ------
+    chunk
+        Mapping of column name to 1D array.
+
+    """
+    path = Path(path)
+    if path.suffix == ".npy":
+        array = np.load(path, mmap_mode="r")
+        for start in range(0, len(array), chunk_size):
+            block = array[start : start + chunk_size]
+            if block.dtype.names is None:
+                yield {
+                    k: np.asarray(block[:, i], float)
+                    for i, k in enumerate(RECORD_COLUMNS)
+                }
+            else:
+                yield {k: np.asarray(block[k], float) for k in RECORD_COLUMNS}
+        return
+
+    with path.open(newline="") as f:
+        header = [name.strip() for name in next(csv.reader([f.readline()]))]
+        missing = set(RECORD_COLUMNS) - set(header)
+        if missing:
+            raise ValueError(f"Missing columns in {path}: {sorted(missing)}")
+        usecols = [header.index(k) for k in RECORD_COLUMNS]
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            block = np.loadtxt(lines, delimiter=",", usecols=usecols, ndmin=2)
+            yield dict(zip(RECORD_COLUMNS, block.T))
+
+
+class RunningStats:
+    """Count, mean and variance of values per bin, updated chunk by chunk.
+
+    Moments are accumulated by Welford's algorithm generalized to batches (Chan et
+    al.), which is numerically stable and lets partial results be merged in any
+    order.
+
+    Parameters
+    ----------
+    n_bins
+        Number of bins.
+    n_values
+        Number of quantities accumulated per record.
+
+    Examples
+    --------
+    >>> stats = RunningStats(2)
+    >>> stats.update(np.array([0, 0, 1]), np.array([1.0, 3.0, 5.0]))
+    >>> stats.mean
+    array([[2.],
+           [5.]])
+
+    """
+
+    def __init__(self, n_bins: int, n_values: int = 1) -> None:
+        self.count = np.zeros(n_bins, dtype=np.int64)
+        self._mean = np.zeros((n_bins, n_values))
+        self._m2 = np.zeros((n_bins, n_values))
+
+    def update(self, bins: np.ndarray, values: np.ndarray) -> None:
+        """Add values, ``values[i]`` to bin ``bins[i]``. Records with bin index out
+        of range are ignored."""
+        n_bins, n_values = self._mean.shape
+        values = np.asarray(values, dtype=float).reshape(len(bins), n_values)
+        valid = (bins >= 0) & (bins < n_bins) & np.isfinite(values).all(axis=1)
+        bins, values = bins[valid], values[valid]
+
+        count = np.bincount(bins, minlength=n_bins)
+        mean = np.empty((n_bins, n_values))
+        m2 = np.empty((n_bins, n_values))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i in range(n_values):
+                mean[:, i] = np.bincount(bins, values[:, i], n_bins) / count
+                deviation = values[:, i] - mean[bins, i]
+                m2[:, i] = np.bincount(bins, deviation * deviation, n_bins)
+        self._combine(count, np.nan_to_num(mean), m2)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine statistics of ``other`` into this one in place."""
+        if other._mean.shape != self._mean.shape:
+            raise ValueError("Cannot merge statistics of different shapes.")
+        self._combine(other.count, other._mean, other._m2)
+        return self
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        total = self.count + count
+        weight = np.divide(count, total, out=np.zeros(len(total)), where=total > 0)
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * (self.count * weight)[:, None]
+        self._mean += delta * weight[:, None]
+        self.count = total
+
+    def _empty_as_nan(self, array: np.ndarray) -> np.ndarray:
+        return np.where((self.count > 0)[:, None], array, np.nan)
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Mean of values in each bin, in shape (bins, values)."""
+        return self._empty_as_nan(self._mean)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance of values in each bin."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._empty_as_nan(self._m2 / self.count[:, None])
+
+    @property
+    def std(self) -> np.ndarray:
+        """Standard deviation of values in each bin."""
+        return np.sqrt(self.variance)
+
+    @property
+    def rms(self) -> np.ndarray:
+        """Root mean square of values in each bin."""
+        return np.sqrt(self.mean**2 + self.variance)
+
+
+def _bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Index of bin each value falls in, -1 for values outside the edges. Bins are
+    half-open except the last one, which includes its upper edge as in
+    ``np.histogram``."""
+    index = np.searchsorted(edges, values, side="right") - 1
+    index[values == edges[-1]] = len(edges) - 2
+    index[(index >= len(edges) - 1) | np.isnan(values)] = -1
+    return index
+
+
+class ResidualStats:
+    """Residuals of measured pointing offsets against a pointing error model.
+
+    Residuals (measured offsets minus offsets predicted by ``params``) are
+    accumulated per Az-El bin and per time bin. A record counts as an outlier if the
+    residual projected on the sky, :math:`\\sqrt{(\\Delta Az \\cos El)^2 +
+    \\Delta El^2}`, exceeds ``threshold``.
+
+    Parameters
+    ----------
+    params
+        Pointing error parameters currently in use.
+    time_bins
+        Edges of time bins, in the same unit as ``time`` column of the records.
+    az_bins, el_bins
+        Edges of Az-El bins. All bins include their lower edge, and the last bin
+        also includes its upper edge, as in ``np.histogram``; e.g. records at
+        El=90deg fall in the highest El bin by default. Records outside the edges are
+        ignored.
+    threshold
+        Limit of residual above which records are counted as outliers.
+
+    Examples
+    --------
+    >>> stats = ResidualStats.from_files(
+    ...     ["2024-05.csv", "2024-06.csv"],
+    ...     params,
+    ...     time_bins=np.arange(60431, 60492),  # Daily bins in MJD.
+    ...     processes=4,
+    ... )
+    >>> stats.azel_table()
+    <QTable length=162>
+    az_min az_max el_min el_max count ... mean_d_el rms_d_az rms_d_el outlier_rate
+     deg    deg    deg    deg         ...   arcsec   arcsec   arcsec
+    ------ ------ ------ ------ ----- ... --------- -------- -------- ------------
+    -270.0 -240.0    0.0   10.0     0 ...       nan      nan      nan          nan
+    ...
+
+    """
+
+    def __init__(
+        self,
+        params: PointingError,
+        time_bins: Sequence[float],
+        az_bins: u.Quantity = np.arange(-270, 271, 30) * u.deg,
+        el_bins: u.Quantity = np.arange(0, 91, 10) * u.deg,
+        threshold: u.Quantity = 10 * u.arcsec,
+    ) -> None:
+        self.time_bins = np.asarray(time_bins, dtype=float)
+        self.az_bins = u.Quantity(az_bins, u.deg)
+        self.el_bins = u.Quantity(el_bins, u.deg)
+        self.threshold = u.Quantity(threshold, u.arcsec)
+        self._coefficients = params._coefficients()
+
+        n_az, n_el = len(self.az_bins) - 1, len(self.el_bins) - 1
+        self.azel = RunningStats(n_el * n_az, 2)
+        """Statistics of (d_az, d_el) residuals, flattened from shape (el, az)."""
+        self.trend = RunningStats(len(self.time_bins) - 1, 2)
+        """Statistics of (d_az, d_el) residuals per time bin."""
+        self.azel_outliers = np.zeros(n_el * n_az, dtype=np.int64)
+        self.trend_outliers = np.zeros(len(self.time_bins) - 1, dtype=np.int64)
+
+    def update(self, records: Dict[str, np.ndarray]) -> None:
+        """Add a chunk of records, as yielded by :func:`read_records`."""
+        az = np.radians(np.asarray(records["az"], dtype=float))
+        el = np.radians(np.asarray(records["el"], dtype=float))
+        d_az, d_el = np.empty(az.shape), np.empty(az.shape)
+        work = tuple(np.empty(az.shape) for _ in range(3))
+        _offset_kernel(self._coefficients, az, el, d_az, d_el, work)
+        residual = np.empty((len(az), 2))
+        np.subtract(records["d_az"], d_az, out=residual[:, 0])
+        np.subtract(records["d_el"], d_el, out=residual[:, 1])
+
+        projected = np.cos(el, out=d_az)
+        projected *= residual[:, 0]
+        outlier = np.hypot(projected, residual[:, 1]) > self.threshold.value
+
+        az_index = _bin_index(np.degrees(az), self.az_bins.value)
+        el_index = _bin_index(np.degrees(el), self.el_bins.value)
+        azel_index = el_index * (len(self.az_bins) - 1) + az_index
+        azel_index[(az_index < 0) | (el_index < 0)] = -1
+        time_index = _bin_index(np.asarray(records["time"], float), self.time_bins)
+
+        for stats, outliers, index in (
+            (self.azel, self.azel_outliers, azel_index),
+            (self.trend, self.trend_outliers, time_index),
+        ):
+            stats.update(index, residual)
+            valid = (index >= 0) & outlier & np.isfinite(residual).all(axis=1)
+            outliers += np.bincount(index[valid], minlength=len(outliers))
+
+    def merge(self, other: "ResidualStats") -> "ResidualStats":
+        """Combine statistics of ``other``, with identical binning, in place."""
+        if not (
+            np.array_equal(self.time_bins, other.time_bins)
+            and np.array_equal(self.az_bins.value, other.az_bins.value)
+            and np.array_equal(self.el_bins.value, other.el_bins.value)
+        ):
+            raise ValueError("Cannot merge statistics of different binning.")
+        self.azel.merge(other.azel)
+        self.trend.merge(other.trend)
+        self.azel_outliers += other.azel_outliers
+        self.trend_outliers += other.trend_outliers
+        return self
+
+    @classmethod
+    def from_files(
+        cls,
+        paths: Iterable[os.PathLike],
+        params: PointingError,
+        time_bins: Sequence[float],
+        *,
+        chunk_size: int = 1 << 16,
+        processes: Optional[int] = None,
+        **kwargs,
+    ) -> "ResidualStats":
+        """Accumulate records in the files, each of which read by
+        :func:`read_records`.
+
+        Parameters
+        ----------
+        paths
+            Paths to the record files.
+        params, time_bins
+            Passed to the class constructor.
+        chunk_size
+            Number of records processed at once.
+        processes
+            Number of worker processes. Files are distributed over the workers, and
+            partial statistics are merged. If not specified, files are processed in
+            this process.
+        kwargs
+            Other keyword arguments passed to the class constructor.
+
+        """
+        template = cls(params, time_bins, **kwargs)
+        result = copy.deepcopy(template)
+        if processes is None:
+            for path in paths:
+                result.merge(_reduce_file(path, template, chunk_size))
+        else:
+            paths = list(paths)
+            with ProcessPoolExecutor(processes) as executor:
+                for partial in executor.map(
+                    _reduce_file,
+                    paths,
+                    [template] * len(paths),
+                    [chunk_size] * len(paths),
+                ):
+                    result.merge(partial)
+        return result
+
+    def _table(
+        self, stats: RunningStats, outliers: np.ndarray, bins: Dict[str, u.Quantity]
+    ) -> QTable:
+        table = QTable(bins)
+        table["count"] = stats.count
+        for name, value in (("mean", stats.mean), ("rms", stats.rms)):
+            table[f"{name}_d_az"] = value[:, 0] * u.arcsec
+            table[f"{name}_d_el"] = value[:, 1] * u.arcsec
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table["outlier_rate"] = outliers / stats.count
+        return table
+
+    def azel_table(self) -> QTable:
+        """Summary of residuals per Az-El bin; count, mean and RMS of residuals in
+        each axis and rate of outliers."""
+        az_min, el_min = np.meshgrid(self.az_bins[:-1], self.el_bins[:-1])
+        az_max, el_max = np.meshgrid(self.az_bins[1:], self.el_bins[1:])
+        bins = dict(
+            az_min=az_min.ravel(),
+            az_max=az_max.ravel(),
+            el_min=el_min.ravel(),
+            el_max=el_max.ravel(),
+        )
+        return self._table(self.azel, self.azel_outliers, bins)
+
+    def trend_table(self) -> QTable:
+        """Summary of residuals per time bin, in the same format as
+        :meth:`azel_table`."""
+        bins = dict(time_min=self.time_bins[:-1], time_max=self.time_bins[1:])
+        return self._table(self.trend, self.trend_outliers, bins)
+
+    def rms_map(self) -> Tuple[u.Quantity, u.Quantity]:
+        """RMS of residuals per Az-El bin, in shape (el, az) for each axis."""
+        shape = (len(self.el_bins) - 1, len(self.az_bins) - 1)
+        rms = self.azel.rms.reshape(*shape, 2) * u.arcsec
+        return rms[..., 0], rms[..., 1]
+
+
+def _reduce_file(
+    path: os.PathLike, template: ResidualStats, chunk_size: int
+) -> ResidualStats:
+    stats = copy.deepcopy(template)
+    for chunk in read_records(path, chunk_size):
+        stats.update(chunk)
+    return stats
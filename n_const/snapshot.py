@@ -0,0 +1,356 @@
+"""Precompiled snapshot of site configuration.
+
+Constants, pointing error parameters and observation parameters are packed into a
+single binary file, which can be loaded with one memory map and checked against a
+checksum. Each object is reconstructed only when it's accessed.
+
+The file consists of a fixed size header and a body::
+
+    header  magic, format version, CRC-32 of body, body size
+    body    string table     interned keys, string values and unit names
+            object table     name, class and location of each object
+            object payloads  packed fields of each object
+
+"""
+
+__all__ = ["compile_snapshot", "Snapshot"]
+
+import argparse
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from functools import lru_cache
+from numbers import Integral, Real
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import astropy.units as u
+import numpy as np
+from astropy.coordinates import Angle
+
+from . import constants
+from .data_format import DataClass, _frozen_class, _mutable_class
+from .deprecated import Constants
+from .obsparams import ObsParams
+from .pointing import PointingError
+
+MAGIC = b"NCSS"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHxxIQ")
+_OBJECT = struct.Struct("<IIQQ")
+_U32 = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+_NONE, _BOOL, _INT_TAG, _FLOAT_TAG, _STR, _QUANTITY, _ANGLE = range(7)
+
+_CLASSES = {
+    cls.__name__: cls for cls in (DataClass, Constants, PointingError, ObsParams)
+}
+CONSTANTS = ("XFFTS", "AC240", "REST_FREQ")
+"""Names of objects in ``n_const.constants`` included in snapshots by default."""
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, string: str) -> int:
+        return self.ids.setdefault(str(string), len(self.ids))
+
+    def pack(self) -> bytes:
+        packed = [_U32.pack(len(self.ids))]
+        for string in self.ids:
+            encoded = string.encode("utf-8")
+            packed.extend([_U32.pack(len(encoded)), encoded])
+        return b"".join(packed)
+
+
+def _pack_value(value: Any, intern: _StringTable) -> bytes:
+    if value is None:
+        return bytes([_NONE])
+    if isinstance(value, (bool, np.bool_)):
+        return bytes([_BOOL, bool(value)])
+    if isinstance(value, Integral):
+        return bytes([_INT_TAG]) + _INT.pack(int(value))
+    if isinstance(value, Real):
+        return bytes([_FLOAT_TAG]) + _FLOAT.pack(float(value))
+    if isinstance(value, str):
+        return bytes([_STR]) + _U32.pack(intern(value))
+    if isinstance(value, u.Quantity) and value.dtype.names is None:
+        tag = _ANGLE if isinstance(value, Angle) else _QUANTITY
+        array = np.asarray(value.value, dtype="<f8")
+        return b"".join(
+            [
+                bytes([tag]),
+                _U32.pack(intern(value.unit.to_string())),
+                bytes([array.ndim]),
+                struct.pack(f"<{array.ndim}I", *array.shape),
+                array.tobytes(),
+            ]
+        )
+    raise TypeError(f"Cannot pack value of type {type(value).__name__}: {value!r}")
+
+
+def _pack_object(obj: DataClass, intern: _StringTable) -> bytes:
+    packed = [_U32.pack(len(obj))]
+    for key, value in obj.items():
+        packed.append(_U32.pack(intern(key)))
+        packed.append(_pack_value(value, intern))
+    return b"".join(packed)
+
+
+def compile_snapshot(
+    path: os.PathLike,
+    objects: Dict[str, DataClass],
+    include_constants: bool = True,
+) -> int:
+    """Write objects into a snapshot file.
+
+    Parameters
+    ----------
+    path
+        Path to the snapshot file to write.
+    objects
+        Objects to pack, keyed by the names to look them up with.
+    include_constants
+        If True, objects listed in ``CONSTANTS`` are packed as well.
+
+    Returns
+    -------
+    checksum
+        CRC-32 of the snapshot body, identical to ``Snapshot.checksum``.
+
+    Examples
+    --------
+    >>> compile_snapshot(
+    ...     "site.ncss",
+    ...     {
+    ...         "pointing": PointingError.from_file("path/to/pointing_param.toml"),
+    ...         "obsparams": ObsParams.from_file("path/to/obs_file"),
+    ...     },
+    ... )
+    1234567890
+
+    """
+    if include_constants:
+        objects = {**{k: getattr(constants, k) for k in CONSTANTS}, **objects}
+    intern = _StringTable()
+    payloads, table = [], []
+    for name, obj in objects.items():
+        cls = _mutable_class(type(obj))  # Snapshots published by ``Versioned``.
+        cls_name = cls.__name__
+        if _CLASSES.get(cls_name) is not cls:
+            raise TypeError(f"Cannot pack object of type {cls_name}")
+        payloads.append(_pack_object(obj, intern))
+        table.append((intern(name), intern(cls_name)))
+
+    strings = intern.pack()
+    offset = len(strings) + _U32.size + _OBJECT.size * len(table)
+    packed_table = [_U32.pack(len(table))]
+    for (name_id, cls_id), payload in zip(table, payloads):
+        packed_table.append(_OBJECT.pack(name_id, cls_id, offset, len(payload)))
+        offset += len(payload)
+    body = b"".join([strings, *packed_table, *payloads])
+    checksum = zlib.crc32(body)
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, checksum, len(body)))
+        f.write(body)
+    os.replace(tmp, path)
+    return checksum
+
+
+@lru_cache(maxsize=None)
+def _unit(name: str) -> u.UnitBase:
+    return u.Unit(name)
+
+
+class Snapshot(Mapping):
+    """Read-only view of a snapshot file.
+
+    Objects are reconstructed on first access and cached, so unused ones cost
+    nothing but an entry in the object table. Cached objects are shared by all
+    accesses, so they're read-only, arrays in them included; use their ``copy()``
+    method to get a mutable one.
+
+    Parameters
+    ----------
+    path
+        Path to the snapshot file.
+    verify
+        If True, check the body against the checksum in the header.
+
+    Raises
+    ------
+    ValueError
+        If the file isn't a snapshot, was written in other format version or is
+        corrupted.
+
+    Examples
+    --------
+    >>> snapshot = Snapshot("site.ncss")
+    >>> snapshot["pointing"].dAz
+    <Quantity 5314.24667547 arcsec>
+    >>> snapshot.XFFTS.ch_num
+    32768
+
+    """
+
+    def __init__(self, path: os.PathLike, verify: bool = True) -> None:
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError(f"{path} is not a snapshot file.")
+        magic, version, checksum, size = _HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file.")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"Snapshot format version {version} is not supported, "
+                f"expected {FORMAT_VERSION}."
+            )
+        self.checksum = checksum
+        """CRC-32 of the snapshot body."""
+        body = memoryview(self._buffer)[_HEADER.size :]
+        if len(body) != size or (verify and zlib.crc32(body) != checksum):
+            raise ValueError(f"{path} is corrupted.")
+        self._body = body
+
+        self._strings, pos = self._read_strings()
+        (n_objects,) = _U32.unpack_from(body, pos)
+        pos += _U32.size
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        for _ in range(n_objects):
+            name_id, cls_id, offset, length = _OBJECT.unpack_from(body, pos)
+            pos += _OBJECT.size
+            cls_name = self._strings[cls_id]
+            self._index[self._strings[name_id]] = (cls_name, offset, length)
+        self._cache: Dict[str, DataClass] = {}
+
+    def _read_strings(self) -> Tuple[List[str], int]:
+        (count,) = _U32.unpack_from(self._body, 0)
+        pos = _U32.size
+        strings = []
+        for _ in range(count):
+            (length,) = _U32.unpack_from(self._body, pos)
+            pos += _U32.size
+            strings.append(str(self._body[pos : pos + length], "utf-8"))
+            pos += length
+        return strings, pos
+
+    def _read_value(self, pos: int) -> Tuple[Any, int]:
+        body = self._body
+        tag = body[pos]
+        pos += 1
+        if tag == _NONE:
+            return None, pos
+        if tag == _BOOL:
+            return bool(body[pos]), pos + 1
+        if tag == _INT_TAG:
+            return _INT.unpack_from(body, pos)[0], pos + _INT.size
+        if tag == _FLOAT_TAG:
+            return _FLOAT.unpack_from(body, pos)[0], pos + _FLOAT.size
+        if tag == _STR:
+            return self._strings[_U32.unpack_from(body, pos)[0]], pos + _U32.size
+        (unit_id,) = _U32.unpack_from(body, pos)
+        ndim = body[pos + _U32.size]
+        pos += _U32.size + 1
+        shape = struct.unpack_from(f"<{ndim}I", body, pos)
+        pos += 4 * ndim
+        count = int(np.prod(shape))
+        array = np.frombuffer(body, "<f8", count, pos).reshape(shape).copy()
+        cls = Angle if tag == _ANGLE else u.Quantity
+        value = cls(array if ndim else array[()], _unit(self._strings[unit_id]))
+        if ndim:
+            value.flags.writeable = False
+        return value, pos + 8 * count
+
+    def _load(self, name: str) -> DataClass:
+        cls_name, offset, _ = self._index[name]
+        (n_fields,) = _U32.unpack_from(self._body, offset)
+        pos = offset + _U32.size
+        fields = {}
+        for _ in range(n_fields):
+            (key_id,) = _U32.unpack_from(self._body, pos)
+            fields[self._strings[key_id]], pos = self._read_value(pos + _U32.size)
+        cls = _frozen_class(_CLASSES[cls_name])
+        obj = cls.__new__(cls)
+        obj.__dict__.update(fields)
+        return obj
+
+    def __getitem__(self, name: str) -> DataClass:
+        try:
+            return self._cache[name]
+        except KeyError:
+            obj = self._cache[name] = self._load(name)
+            return obj
+
+    def __getattr__(self, name: str) -> DataClass:
+        if name.startswith("_") or name not in self._index:
+            raise AttributeError(name)
+        return self[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join(self._index)})"
+
+
+def _named_path(arg: str) -> Tuple[Optional[str], Path]:
+    """Split ``[NAME=]PATH``; prefix which isn't an identifier is part of the path."""
+    name, sep, path = arg.partition("=")
+    if sep and name.isidentifier():
+        return name, Path(path)
+    return None, Path(arg)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line interface of ``compile_snapshot``."""
+    parser = argparse.ArgumentParser(
+        prog="n-const-snapshot", description=compile_snapshot.__doc__.split("\n")[0]
+    )
+    parser.add_argument("output", type=Path, help="Path to the snapshot file.")
+    parser.add_argument(
+        "-p",
+        "--pointing",
+        action="append",
+        default=[],
+        metavar="[NAME=]PATH",
+        help="Pointing error parameter file, packed as NAME (default: pointing).",
+    )
+    parser.add_argument(
+        "-o",
+        "--obsparams",
+        action="append",
+        default=[],
+        metavar="[NAME=]PATH",
+        help="Observation parameter file, packed as NAME (default: obsparams).",
+    )
+    parser.add_argument(
+        "--no-constants", action="store_true", help="Don't pack built-in constants."
+    )
+    args = parser.parse_args(argv)
+
+    objects = {}
+    for arg in args.pointing:
+        name, path = _named_path(arg)
+        objects[name or "pointing"] = PointingError.from_file(path)
+    for arg in args.obsparams:
+        name, path = _named_path(arg)
+        objects[name or "obsparams"] = ObsParams.from_file(path)
+    checksum = compile_snapshot(args.output, objects, not args.no_constants)
+    print(f"{args.output}: {len(objects)} object(s), checksum {checksum:08x}")
+
+
+if __name__ == "__main__":
+    main()
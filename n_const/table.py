@@ -0,0 +1,221 @@
+"""Column-oriented tables of configuration parameters."""
+
+__all__ = ["ConfigTable"]
+
+import csv
+import os
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from .data_format import DataClass
+
+
+class ConfigTable:
+    """Read-only table of parameters, stored column by column.
+
+    All indexes are built on construction, so every lookup afterwards is a single
+    hash table access. :meth:`loc`, item access and lookups on a mapping held from
+    :meth:`index` don't create new objects; :meth:`find` builds its key from the
+    keyword arguments on every call.
+
+    Parameters
+    ----------
+    columns
+        Mapping of column name to its values. All columns should have the same length.
+    key
+        Name of the column which uniquely identifies the rows. If not specified, the
+        first column is used.
+    indexes
+        Combinations of column names to build secondary indexes on.
+    dtypes
+        Mapping of column name to its data type. Type of other columns given as
+        strings is inferred from their contents, except for the key column which is
+        kept as is, so that keys like ``"001"`` are preserved.
+
+    Examples
+    --------
+    >>> table = ConfigTable.from_csv(
+    ...     "tests/board_config.csv", indexes=[("beam", "polarization", "sideband")]
+    ... )
+    >>> table.loc("xffts_power_board01")
+    4
+    >>> table["xffts_power_board01"]
+    DataClass(topicname='xffts_power_board01', beam=2, polarization='L', sideband='U')
+    >>> table.find(beam=2, polarization="L", sideband="U")
+    (4, 24)
+    >>> table.column("beam")[:4]
+    array([1, 1, 1, 1])
+
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence[Any]],
+        key: str = None,
+        indexes: Iterable[Sequence[str]] = (),
+        dtypes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not columns:
+            raise ValueError("At least 1 column is required.")
+        self.key = list(columns)[0] if key is None else key
+        dtypes = {} if dtypes is None else dtypes
+        self._columns = {
+            name: self._as_array(v, dtypes.get(name), infer=name != self.key)
+            for name, v in columns.items()
+        }
+        lengths = {len(v) for v in self._columns.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have inconsistent lengths: {sorted(lengths)}")
+        self._length = lengths.pop()
+
+        keys = self.column(self.key).tolist()
+        self._loc = {k: i for i, k in enumerate(keys)}
+        if len(self._loc) != self._length:
+            raise ValueError(f"Values in key column {self.key!r} are not unique.")
+
+        values = {name: v.tolist() for name, v in self._columns.items()}
+        self._rows = [
+            DataClass(**{name: v[i] for name, v in values.items()})
+            for i in range(self._length)
+        ]
+        self._indexes: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], Tuple[int]]] = {}
+        self._index_names: Dict[FrozenSet[str], Tuple[str, ...]] = {}
+        for names in indexes:
+            self._build_index(tuple(names), values)
+
+    @classmethod
+    def from_csv(cls, path: os.PathLike, key: str = None, **kwargs) -> "ConfigTable":
+        """Read CSV file.
+
+        Parameters
+        ----------
+        path
+            Path to the CSV file, whose first line is the header.
+        key
+            Name of the column which uniquely identifies the rows. If not specified,
+            the first column is used.
+        kwargs
+            Keyword arguments passed to the class constructor.
+
+        Notes
+        -----
+        Type of each column except the key column is inferred from its contents;
+        ``int``, ``float`` or ``str``, in this order of priority, unless specified in
+        ``dtypes``. Values in the key column are kept as strings.
+
+        """
+        with Path(path).open("r", newline="") as f:
+            reader = csv.reader(f, skipinitialspace=True)
+            header = [name.strip() for name in next(reader)]
+            rows = [row for row in reader if row]
+        columns = {
+            name: [row[i].strip() for row in rows] for i, name in enumerate(header)
+        }
+        return cls(columns, key=key, **kwargs)
+
+    @staticmethod
+    def _as_array(
+        values: Sequence[Any], dtype: Any = None, infer: bool = True
+    ) -> np.ndarray:
+        array = np.asarray(values, dtype=dtype)
+        if dtype is None and infer and array.dtype.kind in "US":
+            for dtype in (np.int64, np.float64):
+                try:
+                    array = array.astype(dtype)
+                    break
+                except ValueError:
+                    continue
+        array.flags.writeable = False
+        return array
+
+    def _build_index(
+        self, names: Tuple[str, ...], values: Dict[str, List[Any]]
+    ) -> None:
+        for name in names:
+            if name not in self._columns:
+                raise KeyError(f"Unknown column {name!r}")
+        index: Dict[Tuple[Any, ...], List[int]] = {}
+        for i, combination in enumerate(zip(*(values[name] for name in names))):
+            index.setdefault(combination, []).append(i)
+        self._indexes[names] = {k: tuple(v) for k, v in index.items()}
+        self._index_names[frozenset(names)] = names
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._loc
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._loc)
+
+    def __getitem__(self, key: Hashable) -> DataClass:
+        """Row identified by the value of key column.
+
+        The returned object is shared among all callers, so don't modify it.
+
+        """
+        return self._rows[self._loc[key]]
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Names of the columns."""
+        return tuple(self._columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only array of values in the column."""
+        return self._columns[name]
+
+    def loc(self, key: Hashable) -> int:
+        """Row number identified by the value of key column."""
+        return self._loc[key]
+
+    def index(self, *names: str) -> Dict[Tuple[Any, ...], Tuple[int]]:
+        """Secondary index, which maps combination of values to row numbers.
+
+        Holding the returned mapping and looking it up directly is the fastest way to
+        query the table repeatedly. Column names can be given in any order, but keys
+        of the mapping always follow the order declared in ``indexes`` on
+        construction.
+
+        Examples
+        --------
+        >>> index = table.index("beam", "polarization", "sideband")
+        >>> index[(2, "L", "U")]
+        (4, 24)
+        >>> table.index("sideband", "beam", "polarization") is index
+        True
+
+        """
+        return self._indexes[self._declared_names(names)]
+
+    def _declared_names(self, names: Iterable[str]) -> Tuple[str, ...]:
+        """Column names of the index built on ``names``, in declared order."""
+        names = tuple(names)
+        try:
+            return self._index_names[frozenset(names)]
+        except KeyError:
+            raise KeyError(f"No index is built on columns {names}") from None
+
+    def find(self, **kwargs: Any) -> Tuple[int]:
+        """Row numbers whose values match all the given ones.
+
+        The combination of column names should be declared in ``indexes`` on
+        construction, in any order. Empty tuple is returned if no row matches.
+
+        """
+        names = self._declared_names(kwargs)
+        return self._indexes[names].get(tuple(kwargs[name] for name in names), ())
@@ -0,0 +1,257 @@
+"""Visibility of celestial targets from the telescope site.
+
+Elevations of all targets are evaluated at once against a shared time grid, as a 2D
+array of shape (targets, times). Sidereal time of the grid and trigonometric
+functions of the site latitude are computed only once per grid.
+
+"""
+
+__all__ = ["targets_from_obsparams", "VisibilityPlanner", "VisibilityWindows"]
+
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+import astropy.units as u
+import numpy as np
+from astropy.coordinates import GCRS, EarthLocation, SkyCoord
+from astropy.time import Time
+
+from .constants import LOC_NANTEN2
+from .obsparams import ObsParams
+
+try:
+    from astropy.coordinates import TETE
+except ImportError:  # astropy<4.1
+    TETE = None
+
+try:
+    import erfa
+except ImportError:
+    from astropy import _erfa as erfa  # For astropy<4.2
+
+SIDEREAL_RATE = 2 * np.pi / 86164.0905
+"""Rotation rate of the Earth with respect to the equinox, in [rad/s]."""
+
+_FRAMES = {"J2000": "fk5", "B1950": "fk4", "GALACTIC": "galactic", "ICRS": "icrs"}
+
+
+def targets_from_obsparams(params: Iterable[ObsParams]) -> SkyCoord:
+    """Coordinates of ON points, given by ``LambdaOn``, ``BetaOn`` and ``COORD_SYS``.
+
+    Raises
+    ------
+    ValueError
+        If any of the coordinate systems is not celestial one.
+
+    """
+    lon, lat, frames = [], [], []
+    for p in params:
+        frame = _FRAMES.get(str(p.COORD_SYS).upper())
+        if frame is None:
+            raise ValueError(f"Unsupported coordinate system {p.COORD_SYS!r}")
+        lon.append(p.LambdaOn.to_value(u.deg))
+        lat.append(p.BetaOn.to_value(u.deg))
+        frames.append(frame)
+    lon, lat, frames = np.array(lon), np.array(lat), np.array(frames)
+    ra, dec = np.empty(len(lon)), np.empty(len(lon))
+    for frame in set(frames):
+        mask = frames == frame
+        coord = SkyCoord(lon[mask], lat[mask], frame=frame, unit=u.deg).icrs
+        ra[mask], dec[mask] = coord.ra.deg, coord.dec.deg
+    return SkyCoord(ra, dec, frame="icrs", unit=u.deg)
+
+
+def _true_equator(targets: SkyCoord, epoch: Time) -> Tuple[np.ndarray, np.ndarray]:
+    """Geocentric apparent RA and Dec in [rad], referred to the true equator and
+    equinox of ``epoch``; equivalent of ``TETE`` frame which astropy<4.1 lacks."""
+    gcrs = targets.transform_to(GCRS(obstime=epoch))
+    x, y, z = np.einsum(
+        "ij,j...->i...",
+        erfa.pnm06a(epoch.tt.jd1, epoch.tt.jd2),
+        gcrs.cartesian.xyz.value,
+    )
+    return np.arctan2(y, x) % (2 * np.pi), np.arctan2(z, np.hypot(x, y))
+
+
+class VisibilityWindows(NamedTuple):
+    """Time ranges in which targets are above the elevation limit, sorted by target
+    and time."""
+
+    target: np.ndarray
+    """Index of the target each window belongs to."""
+    rise: Time
+    """Start of the windows."""
+    set: Time
+    """End of the windows."""
+
+
+class _TimeGrid(NamedTuple):
+    times: Time
+    lst: np.ndarray
+    """Local apparent sidereal time in [rad]."""
+
+
+class VisibilityPlanner:
+    """Evaluate elevation of many targets over a time range.
+
+    Parameters
+    ----------
+    location
+        Location of the telescope.
+
+    Notes
+    -----
+    Targets are converted to apparent equatorial coordinates once, at the middle of
+    the time range, and atmospheric refraction is not taken into account. Resulting
+    elevations agree with ``AltAz`` frame without refraction within a few arcsec
+    over a night.
+
+    Examples
+    --------
+    >>> planner = VisibilityPlanner()
+    >>> targets = SkyCoord(["5h35m17s -5d23m28s", "17h45m40s -29d00m28s"])
+    >>> windows = planner.windows(
+    ...     targets, Time("2024-06-01"), Time("2024-06-02"), 30 * u.deg
+    ... )
+    >>> windows.target
+    array([0, 1])
+    >>> windows.rise.iso
+    array(['2024-06-01 13:26:39.629', '2024-06-01 01:08:46.795'], dtype='<U23')
+    >>> windows.set.iso
+    array(['2024-06-01 21:22:24.078', '2024-06-01 10:05:42.906'], dtype='<U23')
+
+    Targets declared in observation parameters can be converted at once:
+
+    >>> targets = targets_from_obsparams([params1, params2, ...])
+
+    """
+
+    def __init__(self, location: EarthLocation = LOC_NANTEN2) -> None:
+        self.location = location
+        lat = location.lat.to_value(u.rad)
+        self._sin_lat, self._cos_lat = np.sin(lat), np.cos(lat)
+        self._grids: Dict[Tuple[float, float, float], _TimeGrid] = {}
+
+    def time_grid(self, start: Time, stop: Time, step: u.Quantity) -> _TimeGrid:
+        """Equally spaced times from ``start`` to ``stop`` and their sidereal time.
+
+        Grids are cached, so repeated queries over the same range are cheap.
+
+        """
+        step_sec = step.to_value(u.s)
+        key = (start.utc.mjd, stop.utc.mjd, step_sec)
+        if key not in self._grids:
+            n = int(np.ceil(((stop - start).to_value(u.s)) / step_sec)) + 1
+            times = start + np.arange(n) * step_sec * u.s
+            lst = times.sidereal_time("apparent", longitude=self.location.lon)
+            lst = np.unwrap(lst.to_value(u.rad))
+            if len(self._grids) > 16:
+                self._grids.pop(next(iter(self._grids)))
+            self._grids[key] = _TimeGrid(times, lst)
+        return self._grids[key]
+
+    def _apparent(self, targets: SkyCoord, epoch: Time) -> Tuple[np.ndarray, ...]:
+        if TETE is None:
+            ra, dec = _true_equator(targets, epoch)
+        else:
+            coord = targets.transform_to(TETE(obstime=epoch))
+            ra, dec = coord.ra.to_value(u.rad), coord.dec.to_value(u.rad)
+        ra, dec = np.atleast_1d(ra), np.atleast_1d(dec)
+        return ra, np.sin(dec), np.cos(dec)
+
+    def _sin_elevation(
+        self, targets: SkyCoord, grid: _TimeGrid
+    ) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        ra, sin_dec, cos_dec = apparent = self._apparent(
+            targets, grid.times[len(grid.times) // 2]
+        )
+        hour_angle = grid.lst[None, :] - ra[:, None]
+        sin_el = np.cos(hour_angle, out=hour_angle)
+        sin_el *= (self._cos_lat * cos_dec)[:, None]
+        sin_el += (self._sin_lat * sin_dec)[:, None]
+        return sin_el, apparent
+
+    def elevation(
+        self,
+        targets: SkyCoord,
+        start: Time,
+        stop: Time,
+        step: u.Quantity = 1 * u.min,
+    ) -> Tuple[Time, u.Quantity]:
+        """Elevation curves of the targets.
+
+        Returns
+        -------
+        times
+            Time grid, of shape (times,).
+        elevation
+            Elevation of the targets, of shape (targets, times).
+
+        """
+        grid = self.time_grid(start, stop, step)
+        sin_el, _ = self._sin_elevation(targets, grid)
+        return grid.times, np.arcsin(np.clip(sin_el, -1, 1)) * u.rad
+
+    def windows(
+        self,
+        targets: SkyCoord,
+        start: Time,
+        stop: Time,
+        el_limit: u.Quantity,
+        step: u.Quantity = 10 * u.min,
+    ) -> VisibilityWindows:
+        """Time ranges in which the targets are above ``el_limit``.
+
+        Crossings of the limit are first located on the time grid, then refined to
+        the exact hour angle at which the elevation equals the limit. Windows are
+        clipped at ``start`` and ``stop``.
+
+        Parameters
+        ----------
+        targets
+            Coordinates of the targets.
+        start, stop
+            Time range to search for the windows.
+        el_limit
+            Lower limit of elevation.
+        step
+            Interval of the time grid. Windows shorter than this may be missed.
+
+        """
+        grid = self.time_grid(start, stop, step)
+        sin_el, (ra, sin_dec, cos_dec) = self._sin_elevation(targets, grid)
+        sin_limit = np.sin(el_limit.to_value(u.rad))
+        above = sin_el >= sin_limit
+
+        step_sec = step.to_value(u.s)
+        span = min((above.shape[1] - 1) * step_sec, (stop - start).to_value(u.s))
+
+        target, idx = np.nonzero(above[:, 1:] != above[:, :-1])
+        rising = above[target, idx + 1]
+        cos_h0 = (sin_limit - self._sin_lat * sin_dec[target]) / (
+            self._cos_lat * cos_dec[target]
+        )
+        h0 = np.arccos(np.clip(cos_h0, -1, 1))
+        ha = grid.lst[idx] - ra[target]
+        delay = np.mod(np.where(rising, -h0, h0) - ha, 2 * np.pi) / SIDEREAL_RATE
+        crossing = np.minimum(idx * step_sec + np.minimum(delay, step_sec), span)
+
+        def _sorted(edges, edge_target):
+            order = np.lexsort((edges, edge_target))
+            return edges[order], edge_target[order]
+
+        initially_above = np.flatnonzero(above[:, 0])
+        finally_above = np.flatnonzero(above[:, -1])
+        rise, rise_target = _sorted(
+            np.r_[crossing[rising], np.zeros(len(initially_above))],
+            np.r_[target[rising], initially_above],
+        )
+        set_, _ = _sorted(
+            np.r_[crossing[~rising], np.full(len(finally_above), span)],
+            np.r_[target[~rising], finally_above],
+        )
+        # The last grid point may be later than ``stop``; targets rising in between
+        # leave windows of zero length at ``stop``.
+        keep = set_ > rise
+        return VisibilityWindows(
+            rise_target[keep], start + rise[keep] * u.s, start + set_[keep] * u.s
+        )
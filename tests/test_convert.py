@@ -0,0 +1,131 @@
+import shutil
+
+import astropy.units as u
+import pytest
+from n_const.convert import (
+    FIELD_MAP,
+    convert_file,
+    convert_tree,
+    main,
+    obs_to_toml,
+    toml_to_obs,
+)
+from n_const.obsparams import ObsParams, obsfile_parser
+
+
+class TestConvertFile:
+    def test_obs_to_toml(self, tmp_path):
+        result = convert_file("tests/horizon.obs", tmp_path / "horizon.obs.toml")
+        assert result.error is None
+        assert result.destination == tmp_path / "horizon.obs.toml"
+        assert "offset_Az" in result.unmapped and "script" in result.unmapped
+        assert "lambda_on" not in result.unmapped
+
+        params = ObsParams.from_file(result.destination)
+        assert params.LambdaOn == 83.80613 * u.deg
+        assert params.StartPositionX == -120 * u.arcsec
+        assert params.scan_velocity == 50 * u.arcsec / u.s
+        assert params.integ_on == 0.6 * u.s
+        assert params.load_interval == 5 * u.min
+        assert params.SCAN_DIRECTION == "X"
+        assert params.OTADEL is False
+        assert params.n_scan == 9
+
+    def test_toml_to_obs(self, tmp_path):
+        result = convert_file("tests/example.obs.toml", tmp_path / "example.obs")
+        assert result.error is None
+        assert set(result.unmapped) == {
+            "RELATIVE",
+            "deltaLambda",
+            "deltaBeta",
+            "position_angle",
+            "integ_hot",
+            "off_interval",
+        }
+        params = obsfile_parser(result.destination)
+        assert params["lambda_on"] == pytest.approx((3 + 15 / 60 + 8 / 3600) * 15)
+        assert params["otadel"] == "Y"
+        assert params["otfvel"] == 600
+        assert params["load_interval"] == 5
+        assert params["N"] == 30 and isinstance(params["N"], int)
+
+    def test_round_trip(self):
+        original = obsfile_parser("tests/horizon.obs")
+        tables, _ = obs_to_toml(original)
+        params, unmapped = toml_to_obs(tables)
+        assert unmapped == ()
+        assert list(params) == [f.obs for f in FIELD_MAP]
+        for name, value in params.items():
+            assert value == pytest.approx(original[name]), name
+
+    def test_error(self, tmp_path):
+        (tmp_path / "broken.obs").write_text("scan_direction=2\n")
+        result = convert_file(tmp_path / "broken.obs")
+        assert result.destination is None
+        assert result.error.startswith("KeyError")
+
+
+class TestConvertTree:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        for i, sub in enumerate(["a", "a/b", "c"]):
+            (tmp_path / "archive" / sub).mkdir(parents=True)
+            shutil.copy("tests/horizon.obs", tmp_path / "archive" / sub / f"{i}.obs")
+        return tmp_path / "archive"
+
+    def test_convert_tree(self, archive, tmp_path):
+        results = convert_tree(archive, tmp_path / "out")
+        assert [r.destination for r in results] == [
+            tmp_path / "out" / "a" / "0.obs.toml",
+            tmp_path / "out" / "a" / "b" / "1.obs.toml",
+            tmp_path / "out" / "c" / "2.obs.toml",
+        ]
+        back = convert_tree(tmp_path / "out", tmp_path / "back", to="obs", processes=2)
+        assert [r.destination for r in back] == [
+            tmp_path / "back" / "a" / "0.obs",
+            tmp_path / "back" / "a" / "b" / "1.obs",
+            tmp_path / "back" / "c" / "2.obs",
+        ]
+        assert all(r.error is None and r.unmapped == () for r in back)
+
+        with pytest.raises(ValueError):
+            convert_tree(archive, to="yaml")
+
+    def test_keep_original(self, archive, tmp_path):
+        original = (archive / "c" / "2.obs").read_text()
+        convert_tree(archive)
+        with pytest.raises(ValueError):
+            convert_tree(archive, to="obs")
+        with pytest.raises(ValueError):
+            convert_tree(archive, archive, to="obs")
+
+        # Results of another conversion are in the way.
+        shutil.copy(archive / "c" / "2.obs.toml", tmp_path / "2.obs")
+        result = convert_file(archive / "c" / "2.obs.toml", tmp_path / "2.obs")
+        assert result.destination is None
+        assert result.error.startswith("FileExistsError")
+        result = convert_file(
+            archive / "c" / "2.obs.toml", tmp_path / "2.obs", overwrite=True
+        )
+        assert result.error is None
+
+        toml = (archive / "c" / "2.obs.toml").read_text()
+        (archive / "c" / "2.obs.toml").write_text("")
+        results = convert_tree(archive)
+        assert all(r.error.startswith("FileExistsError") for r in results)
+        assert (archive / "c" / "2.obs.toml").read_text() == ""
+        convert_tree(archive, overwrite=True)
+        assert (archive / "c" / "2.obs.toml").read_text() == toml
+        assert (archive / "c" / "2.obs").read_text() == original
+
+    def test_main(self, archive, capsys):
+        main([str(archive)])
+        assert (archive / "a" / "0.obs.toml").exists()
+        output = capsys.readouterr().out
+        assert "3 converted, 0 failed" in output
+        assert "unmapped script: 3 file(s)" in output
+
+        main([str(archive)])
+        assert "0 converted, 3 failed" in capsys.readouterr().out
+        main([str(archive), "--force"])
+        assert "3 converted, 0 failed" in capsys.readouterr().out
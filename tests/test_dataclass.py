@@ -1,7 +1,12 @@
 import sys
+import threading
 
+import astropy.units as u
+import numpy as np
 import pytest
-from n_const.data_format import DataClass
+from astropy.coordinates import Angle
+from n_const.data_format import DataClass, Versioned, derived_property
+from n_const.pointing import PointingError
 
 PYTHON_VERSION = sys.version_info
 
@@ -151,3 +156,199 @@ class TestDataClass:
         assert DataClass(a=1, b=2) == DataClass(a=1, b=2)
         assert DataClass(a=1, b=2) != DataClass(a="1", b=2)
         assert DataClass(a=1, b=2) != DataClass(a=2, b=2)
+
+    def test_fingerprint(self):
+        data = DataClass(a=1, b=0.3, c="abc", d=[1, 2], e=None, f=True)
+        fingerprint = data.fingerprint()
+        assert len(fingerprint) == 64
+        assert data.fingerprint() is fingerprint
+        # Pinned, to ensure the digest is stable across versions.
+        assert fingerprint == (
+            "89ef64a056f9264183dbbb03c574be67afd97cc979d4ada8b17854b20de0b644"
+        )
+
+    def test_fingerprint_normalization(self):
+        test_cases = [
+            (DataClass(a=1, b=2), DataClass(b=2, a=1)),
+            (DataClass(a=0.1 + 0.2), DataClass(a=0.3)),
+            (DataClass(a=-0.0), DataClass(a=0.0)),
+            (DataClass(a=1 * u.km), DataClass(a=1000 * u.m)),
+            (DataClass(a=Angle("1h")), DataClass(a=15 * u.deg)),
+            (DataClass(a=3600 * u.arcsec), DataClass(a=1 * u.deg)),
+            (DataClass(a=np.float64(1.5)), DataClass(a=1.5)),
+            (DataClass(a={"x": 1, "y": 2}), DataClass(a={"y": 2, "x": 1})),
+        ]
+        for a, b in test_cases:
+            assert a.fingerprint() == b.fingerprint()
+
+        test_cases = [
+            (DataClass(a=1), DataClass(a="1")),
+            (DataClass(a=1), DataClass(a=1.0)),
+            (DataClass(a=1), DataClass(a=True)),
+            (DataClass(a=1 * u.m), DataClass(a=1 * u.s)),
+            (DataClass(a=[1, 2]), DataClass(a=[2, 1])),
+            (DataClass(a=[1, 2] * u.m), DataClass(a=[[1, 2]] * u.m)),
+            (DataClass(a="b"), DataClass(b="a")),
+            (DataClass(a=1), Rectangle(a=1)),
+        ]
+        for a, b in test_cases:
+            assert a.fingerprint() != b.fingerprint()
+
+        with pytest.raises(TypeError):
+            DataClass(a=object()).fingerprint()
+
+    def test_fingerprint_update(self):
+        data = DataClass(a=1, b=2)
+        before = data.fingerprint()
+        data["a"] = 10
+        assert data.fingerprint() != before
+        data.a = 1
+        assert data.fingerprint() == before
+        data.update(DataClass(c=3))
+        assert data.fingerprint() == DataClass(a=1, b=2, c=3).fingerprint()
+        data.pop("c")
+        assert data.fingerprint() == before
+        data.clear()
+        assert data.fingerprint() == DataClass().fingerprint()
+
+        snapshot = Versioned(DataClass(a=1, b=2)).snapshot
+        assert snapshot.fingerprint() == before
+
+
+class Rectangle(DataClass):
+    computed = 0
+
+    @derived_property("width", "height")
+    def area(self):
+        Rectangle.computed += 1
+        return self.width * self.height
+
+
+class TestDerivedProperty:
+    def test_cache(self):
+        Rectangle.computed = 0
+        rect = Rectangle(width=2, height=3, color="red")
+        assert rect.area == 6
+        assert rect.area == 6
+        assert Rectangle.computed == 1
+        assert "area" not in rect
+        assert len(rect) == 3
+        assert repr(rect) == "Rectangle(width=2, height=3, color='red')"
+
+    def test_invalidation(self):
+        Rectangle.computed = 0
+        rect = Rectangle(width=2, height=3, color="red")
+        _ = rect.area
+        rect.color = "blue"
+        rect["color"] = "green"
+        rect.update(DataClass(color="white"))
+        assert rect.area == 6
+        assert Rectangle.computed == 1
+
+        mutations = [
+            lambda: setattr(rect, "width", 5),
+            lambda: rect.__setitem__("height", 4),
+            lambda: rect.update(DataClass(width=1)),
+            lambda: rect.pop("height"),
+            lambda: rect.__setitem__("height", 1),
+            rect.clear,
+        ]
+        for i, mutate in enumerate(mutations, start=2):
+            mutate()
+            try:
+                _ = rect.area
+            except AttributeError:
+                pass
+            assert Rectangle.computed == i
+
+    def test_snapshot(self):
+        Rectangle.computed = 0
+        rect = Rectangle(width=2, height=3)
+        _ = rect.area
+        snapshot = Versioned(rect).snapshot
+        assert snapshot.area == 6
+        assert Rectangle.computed == 2
+        assert snapshot.copy().area == 6
+        assert Rectangle.computed == 3
+
+
+class TestVersioned:
+    def test_snapshot(self):
+        original = DataClass(a=1, b=2)
+        params = Versioned(original)
+        snapshot = params.snapshot
+        assert snapshot == original
+        assert isinstance(snapshot, DataClass)
+        original["a"] = 100
+        assert snapshot.a == 1
+
+        for mutate in [
+            lambda: setattr(snapshot, "a", 10),
+            lambda: snapshot.__setitem__("a", 10),
+            lambda: snapshot.__delitem__("a"),
+            lambda: snapshot.update(DataClass(c=3)),
+            lambda: snapshot.pop("a"),
+            snapshot.popitem,
+            snapshot.clear,
+        ]:
+            with pytest.raises(TypeError):
+                mutate()
+        assert snapshot == DataClass(a=1, b=2)
+
+        copied = snapshot.copy()
+        copied.a = 10
+        assert copied.a == 10
+        assert snapshot.a == 1
+
+    def test_edit(self):
+        params = Versioned(PointingError.from_file("tests/hosei_230.toml"))
+        before = params.snapshot
+        with params.edit() as draft:
+            draft.dAz = draft.dAz * 2
+            draft["de"] = draft.de * 2
+        version, after = params.read()
+        assert version == params.version == 1
+        assert isinstance(after, PointingError)
+        assert after.dAz == before.dAz * 2
+        assert after.de == before.de * 2
+        assert params.changed_since(0)
+        assert not params.changed_since(1)
+
+        with params.edit():
+            pass
+        assert params.version == 1
+
+        with pytest.raises(RuntimeError):
+            with params.edit() as draft:
+                draft.dAz = 0
+                raise RuntimeError
+        assert params.version == 1
+        assert params.snapshot is after
+
+        assert params.publish(DataClass(a=1)) == 2
+        assert params.snapshot == DataClass(a=1)
+
+    def test_threads(self):
+        params = Versioned(DataClass(a=0, b=0))
+        torn = []
+
+        def read():
+            for _ in range(10000):
+                snapshot = params.snapshot
+                if snapshot.a != snapshot.b:
+                    torn.append(snapshot)
+
+        def write():
+            for _ in range(1000):
+                with params.edit() as draft:
+                    draft.a += 1
+                    draft.b += 1
+
+        threads = [threading.Thread(target=f) for f in [read, read, write, write]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert torn == []
+        assert params.version == 2000
+        assert params.snapshot == DataClass(a=2000, b=2000)
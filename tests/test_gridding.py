@@ -0,0 +1,71 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from n_const.gridding import FWHM2SIGMA, OTFGridder
+from n_const.obsparams import ObsParams
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-100, 100, 2000) * u.arcsec
+    y = rng.uniform(-60, 60, 2000) * u.arcsec
+    spectra = rng.normal(size=(2000, 7))
+    return x, y, spectra
+
+
+def brute_force(gridder, x, y, spectra):
+    sigma = gridder.kernel_fwhm.value * FWHM2SIGMA
+    support = gridder.support.value
+    cube = np.full((spectra.shape[1], *gridder.shape), np.nan)
+    for j, py in enumerate(gridder.y.value):
+        for i, px in enumerate(gridder.x.value):
+            r2 = (x.value - px) ** 2 + (y.value - py) ** 2
+            near = r2 <= support**2
+            if near.any():
+                w = np.exp(-r2[near] / (2 * sigma**2))
+                cube[:, j, i] = w @ spectra[near] / w.sum()
+    return cube
+
+
+class TestOTFGridder:
+    def test_grid(self, samples):
+        x, y, spectra = samples
+        gridder = OTFGridder(x, y, (9, 15), 20 * u.arcsec, 25 * u.arcsec)
+        assert gridder.support == 25 * u.arcsec
+        assert gridder.x[0] == -140 * u.arcsec
+        assert gridder.y[-1] == 80 * u.arcsec
+
+        cube = gridder.grid(spectra)
+        assert cube.shape == (7, 9, 15)
+        expected = brute_force(gridder, x, y, spectra)
+        assert np.allclose(cube, expected, equal_nan=True)
+        assert np.isnan(cube[:, :, 0]).all()
+        assert (gridder.coverage[:, 0] == 0).all()
+
+        chunked = gridder.grid(spectra, chunk_size=2, max_workers=2)
+        assert np.allclose(cube, chunked, equal_nan=True)
+
+    def test_constant(self, samples):
+        x, y, _ = samples
+        gridder = OTFGridder(x, y, (5, 9), 20 * u.arcsec)
+        spectra = np.ones((len(x), 3), dtype=np.int16)
+        out = np.zeros((3, 5, 9))
+        assert gridder.grid(spectra, out=out) is out
+        assert np.allclose(out, 1)
+
+        with pytest.raises(ValueError):
+            gridder.grid(spectra[:10])
+
+    def test_from_obsparams(self):
+        params = ObsParams.from_file("tests/example.obs.toml")
+        params["scan_spacing"] = 600 * u.arcsec
+        params["position_angle"] = 90 * u.deg
+        x, y = [0, 0] * u.arcsec, [0, 1200] * u.arcsec
+        gridder = OTFGridder.from_obsparams(params, x, y)
+        assert gridder.shape == (30, 11)
+        assert gridder.pixel_size == 600 * u.arcsec
+        cube = gridder.grid(np.array([[1.0], [2.0]]))
+        # Position angle of 90 deg rotates +y offset onto +x axis of the map.
+        assert cube[0, 14, 5] == pytest.approx(1, abs=1e-6)
+        assert cube[0, 14, 7] == pytest.approx(2, abs=1e-6)
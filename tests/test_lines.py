@@ -0,0 +1,78 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from n_const import constants
+from n_const.lines import LineCatalog
+
+
+@pytest.fixture
+def catalog():
+    return LineCatalog(
+        ["b", "a", "c", "d"],
+        ["X", "X", "Y", "Z"],
+        ["J=2-1", "J=1-0", "J=1-0", "J=1-0"],
+        [200, 100, 250, 300] * u.GHz,
+    )
+
+
+class TestLineCatalog:
+    def test_sorted(self, catalog):
+        assert catalog.names.tolist() == ["a", "b", "c", "d"]
+        assert u.allclose(catalog.frequency, [100, 200, 250, 300] * u.GHz)
+        assert catalog["c"] == 250 * u.GHz
+        assert "c" in catalog and "e" not in catalog
+        assert catalog[1:3].species.tolist() == ["X", "Y"]
+        assert catalog[2].names.tolist() == ["c"]
+
+        with pytest.raises(ValueError):
+            LineCatalog(["a", "a"], ["X", "X"], ["", ""], [1, 2] * u.GHz)
+
+    def test_search(self, catalog):
+        start, stop = catalog.search([150, 200, 310] * u.GHz, [250, 200, 320] * u.GHz)
+        assert start.tolist() == [1, 1, 4]
+        assert stop.tolist() == [3, 2, 4]
+        start, stop = catalog.search(250 * u.GHz, 50 * u.GHz)
+        assert start == stop
+
+    def test_nearest(self, catalog):
+        index, separation = catalog.nearest([10, 160, 230, 1000] * u.GHz)
+        assert index.tolist() == [0, 1, 2, 3]
+        assert u.allclose(separation, [90, 40, 20, -700] * u.GHz)
+        index, _ = catalog[:1].nearest([50, 150] * u.GHz)
+        assert index.tolist() == [0, 0]
+
+    def test_in_band(self, catalog):
+        start, stop = catalog.in_band(
+            [205, 205, 205] * u.GHz, 4 * u.GHz, 50 * u.GHz, ["USB", "L", "lsb"]
+        )
+        assert start.tolist() == [2, 1, 1]
+        assert stop.tolist() == [3, 2, 2]
+
+        # Source receding at 3000 km/s is observed ~1% lower in frequency.
+        start, stop = catalog.in_band(
+            198 * u.GHz, -1 * u.GHz, 1 * u.GHz, "USB", 3000 * u.km / u.s
+        )
+        assert catalog[start:stop].names.tolist() == ["b"]
+
+    def test_file(self, tmp_path, catalog):
+        catalog.save(tmp_path / "lines.npz")
+        loaded = LineCatalog.from_file(tmp_path / "lines.npz")
+        assert np.array_equal(loaded.names, catalog.names)
+        assert np.array_equal(loaded.transitions, catalog.transitions)
+        assert u.allclose(loaded.frequency, catalog.frequency)
+
+    def test_default(self):
+        catalog = LineCatalog.default()
+        assert LineCatalog.default() is catalog
+        assert np.all(np.diff(catalog.frequency) > 0)
+        for name, frequency in constants.REST_FREQ.items():
+            assert catalog[name] == frequency
+        assert constants.REST_FREQ.j21_12co == 230.538 * u.GHz
+        assert list(constants.REST_FREQ.keys()) == [
+            "j10_12co",
+            "j10_13co",
+            "j10_c18o",
+            "j21_12co",
+            "j21_13co",
+            "j21_c18o",
+        ]
@@ -1,7 +1,12 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
 from astropy.units import Quantity
 from astropy.coordinates import Angle
 
 from n_const import obsparams
+from n_const.data_format import DataClass
 
 horizontal_obsparams = {
     "offset_Az": 0,
@@ -112,3 +117,41 @@ class TestObsParams:
         for param, value in expected.items():
             assert getattr(actual, param) == value
             assert actual[param] == value
+
+    def test_derived(self):
+        params = obsparams.ObsParams.from_file("tests/example.obs.toml")
+        assert params.n_scan == 30
+        assert params.n_points_per_scan == 100
+        assert np.all(params.map_extent == Quantity([6000, 1740], "arcsec"))
+        assert params.on_source_time == Quantity("300s")
+        assert params.n_off == 30
+        assert "on_source_time" not in params
+
+        params["off_interval"] = Quantity(4)
+        assert params.n_off == 8
+        assert params.on_source_time == Quantity("300s")
+        params.update(obsparams.ObsParams(scan_length="5s"))
+        assert params.on_source_time == Quantity("150s")
+        assert params.n_points_per_scan == 50
+        params.n = Quantity(10)
+        assert params.n_scan == 10
+        assert params.n_off == 3
+
+        with pytest.raises(AttributeError):
+            params.n_scan = 3
+        with pytest.raises(AttributeError):
+            params["n_scan"] = 3
+        with pytest.raises(AttributeError):
+            del params.n_scan
+        with pytest.raises(AttributeError):
+            params.update(DataClass(n_scan=3))
+        assert "n_scan" not in params
+        assert params.n_scan == 10
+
+    def test_derived_on_construction(self, tmp_path):
+        with pytest.raises(AttributeError):
+            obsparams.ObsParams(n_scan=5, n=2)
+        toml = Path("tests/example.obs.toml").read_text()
+        (tmp_path / "derived.obs.toml").write_text(toml + "\n[extra]\nn_off = 3\n")
+        with pytest.raises(AttributeError):
+            obsparams.ObsParams.from_file(tmp_path / "derived.obs.toml")
@@ -35,3 +35,14 @@ def test_RadioKisa():
     for param, value in expected.items():
         assert getattr(executed, param) == value
         assert executed[param] == value
+
+
+def test_offset():
+    params = PointingError.from_file("tests/hosei_230.toml")
+    az, el = [0, 10, 90] * u.deg, [30, 45, 60] * u.deg
+    d_az, d_el = params.offset(az, el)
+    assert d_az.shape == d_el.shape == (3,)
+    assert abs(d_az[1] - 5333.531148334987 * u.arcsec) < 1e-6 * u.arcsec
+    assert abs(d_el[1] - 6750.8867013581 * u.arcsec) < 1e-6 * u.arcsec
+    d_az, d_el = params.offset(10 * u.deg, 45 * u.deg)
+    assert d_az.shape == d_el.shape == ()
@@ -0,0 +1,110 @@
+import json
+import os
+
+import astropy.units as u
+import numpy as np
+import pytest
+from n_const.pointing import PointingError
+from n_const.recorrection import recorrect
+
+
+@pytest.fixture
+def params():
+    return PointingError.from_file("tests/hosei_230.toml")
+
+
+@pytest.fixture
+def encoder_log(tmp_path):
+    rng = np.random.default_rng(0)
+    az = rng.uniform(-270, 270, 1000)
+    el = rng.uniform(5, 85, 1000)
+    np.save(tmp_path / "az.npy", az)
+    return az, el
+
+
+def expected(params, az, el):
+    d_az, d_el = params.offset(az * u.deg, el * u.deg)
+    return az - d_az.to_value(u.deg), el - d_el.to_value(u.deg)
+
+
+class TestRecorrect:
+    def test_npy(self, tmp_path, params, encoder_log):
+        np.save(tmp_path / "el.npy", encoder_log[1])
+        az, el = recorrect(
+            tmp_path / "az.npy",
+            tmp_path / "el.npy",
+            tmp_path / "out",
+            params,
+            chunk_size=128,
+        )
+        expected_az, expected_el = expected(params, *encoder_log)
+        assert np.allclose(np.load(az), expected_az)
+        assert np.allclose(np.load(el), expected_el)
+
+    def test_raw_binary(self, tmp_path, params):
+        az_in = np.linspace(0, 360, 100, dtype=np.float32)
+        az_in.tofile(tmp_path / "az.bin")
+        az_in[::-1].tofile(tmp_path / "el.bin")
+        az, el = recorrect(
+            tmp_path / "az.bin",
+            tmp_path / "el.bin",
+            tmp_path / "out",
+            params,
+            chunk_size=30,
+            dtype=np.float32,
+        )
+        expected_az, _ = expected(params, az_in.astype(float), az_in[::-1])
+        assert np.allclose(np.load(az), expected_az)
+
+    def test_processes(self, tmp_path, params, encoder_log):
+        np.save(tmp_path / "el.npy", encoder_log[1])
+        args = (tmp_path / "az.npy", tmp_path / "el.npy")
+        serial = recorrect(*args, tmp_path / "serial", params, chunk_size=100)
+        parallel = recorrect(
+            *args, tmp_path / "parallel", params, chunk_size=100, processes=2
+        )
+        for s, p in zip(serial, parallel):
+            assert np.array_equal(np.load(s), np.load(p))
+
+    def test_resume(self, tmp_path, params, encoder_log):
+        np.save(tmp_path / "el.npy", encoder_log[1])
+        args = (tmp_path / "az.npy", tmp_path / "el.npy", tmp_path / "out", params)
+        az, _ = recorrect(*args, chunk_size=100)
+        progress = json.loads((tmp_path / "out" / "progress.json").read_text())
+        assert progress["done"] == list(range(10))
+
+        corrected = np.load(az, mmap_mode="r+")
+        corrected[:] = 0
+        corrected.flush()
+        progress["done"] = list(range(9))
+        (tmp_path / "out" / "progress.json").write_text(json.dumps(progress))
+
+        recorrect(*args, chunk_size=100)
+        corrected = np.load(az)
+        assert np.all(corrected[:900] == 0)
+        assert np.allclose(corrected[900:], expected(params, *encoder_log)[0][900:])
+
+        recorrect(*args, chunk_size=100, resume=False)
+        assert np.allclose(np.load(az), expected(params, *encoder_log)[0])
+
+    def test_resume_modified_input(self, tmp_path, params, encoder_log):
+        np.save(tmp_path / "el.npy", encoder_log[1])
+        args = (tmp_path / "az.npy", tmp_path / "el.npy", tmp_path / "out", params)
+        recorrect(*args, chunk_size=100)
+
+        # Same length, different content and modification time.
+        new_az = encoder_log[0] + 1
+        np.save(tmp_path / "az.npy", new_az)
+        stat = (tmp_path / "az.npy").stat()
+        os.utime(tmp_path / "az.npy", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        az, _ = recorrect(*args, chunk_size=100)
+        assert np.allclose(np.load(az), expected(params, new_az, encoder_log[1])[0])
+
+    def test_resume_dtype(self, tmp_path, params):
+        values = np.linspace(10, 80, 100)
+        values.tofile(tmp_path / "az.bin")
+        values.tofile(tmp_path / "el.bin")
+        args = (tmp_path / "az.bin", tmp_path / "el.bin", tmp_path / "out", params)
+        recorrect(*args, chunk_size=50, dtype=np.int64)
+        az, _ = recorrect(*args, chunk_size=50, dtype=np.float64)
+        assert np.allclose(np.load(az), expected(params, values, values)[0])
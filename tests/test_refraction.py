@@ -0,0 +1,88 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from astropy.coordinates import AltAz, SkyCoord
+from astropy.time import Time
+from n_const.constants import LOC_NANTEN2
+from n_const.pointing import PointingError
+from n_const.refraction import PointingCorrection, Refraction, Weather
+
+weather = Weather(550 * u.hPa, 0 * u.deg_C, 0.2 * u.one)
+
+
+class TestRefraction:
+    def test_refraction(self):
+        refraction = Refraction.radio()
+        el = [20, 45, 80] * u.deg
+        expected = [91.14266813, 33.45381898, 5.90616358] * u.arcsec
+        assert np.allclose(refraction(el, weather), expected)
+        assert np.all(Refraction.optical()(el, weather) < expected)
+
+    def test_astropy(self):
+        refraction = Refraction.radio()
+        obstime = Time("2024-06-01")
+        kwargs = dict(obstime=obstime, location=LOC_NANTEN2)
+        topocentric = SkyCoord(
+            az=[0, 90] * u.deg, alt=[60, 80] * u.deg, frame=AltAz(**kwargs)
+        )
+        observed = topocentric.transform_to(
+            AltAz(
+                pressure=weather.pressure,
+                temperature=weather.temperature,
+                relative_humidity=weather.humidity,
+                obswl=1 * u.mm,
+                **kwargs,
+            )
+        )
+        expected = observed.alt - topocentric.alt
+        assert np.abs(refraction(topocentric.alt, weather) - expected).max() < (
+            0.05 * u.arcsec
+        )
+
+    def test_coefficients_cache(self):
+        refraction = Refraction.radio()
+        a, b = refraction.coefficients(weather)
+        similar = Weather(550.1 * u.hPa, 273.2 * u.K, 0.205 * u.one)
+        assert refraction.coefficients(similar) == (a, b)
+        assert len(refraction._coefficients) == 1
+        different = Weather(600 * u.hPa, 0 * u.deg_C, 0.2 * u.one)
+        assert refraction.coefficients(different)[0] > a
+
+
+class TestPointingCorrection:
+    def test_correction(self):
+        params = PointingError.from_file("tests/hosei_230.toml")
+        refraction = Refraction.radio()
+        correction = PointingCorrection(params, refraction)
+        az, el = [0, 90, 180] * u.deg, [30, 60, 85] * u.deg
+        d_az, d_el = correction(az, el, weather)
+
+        observed_el = el + refraction(el, weather)
+        expected_az, expected_el = params.offset(az, observed_el)
+        assert np.allclose(d_az, expected_az)
+        assert np.allclose(d_el, expected_el + refraction(el, weather))
+
+        # Buffers are reused for arrays of the same shape.
+        assert np.allclose(correction(az, el, weather)[1], d_el)
+
+    def test_without_refraction(self):
+        params = PointingError.from_file("tests/hosei_230.toml")
+        az, el = [0, 90] * u.deg, [30, 60] * u.deg
+        d_az, d_el = PointingCorrection(params)(az, el)
+        expected_az, expected_el = params.offset(az, el)
+        assert np.allclose(d_az, expected_az)
+        assert np.allclose(d_el, expected_el)
+
+        with pytest.raises(ValueError):
+            PointingCorrection(params, Refraction.radio())(az, el)
+
+    def test_modified_pointing(self):
+        params = PointingError.from_file("tests/hosei_230.toml")
+        correction = PointingCorrection(params)
+        az, el = [0, 90] * u.deg, [30, 60] * u.deg
+        before, _ = correction(az, el)
+
+        correction.pointing["dAz"] = 0 * u.arcsec
+        d_az, _ = correction(az, el)
+        assert not np.allclose(d_az, before)
+        assert np.allclose(d_az, params.offset(az, el)[0])
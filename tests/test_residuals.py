@@ -0,0 +1,134 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from n_const.pointing import PointingError
+from n_const.residuals import RECORD_COLUMNS, ResidualStats, RunningStats, read_records
+
+
+@pytest.fixture
+def params():
+    return PointingError.from_file("tests/hosei_230.toml")
+
+
+@pytest.fixture
+def records(params):
+    rng = np.random.default_rng(0)
+    n = 3000
+    time = np.sort(rng.uniform(0, 10, n))
+    az = rng.uniform(-270, 270, n)
+    el = rng.uniform(0, 90, n)
+    d_az, d_el = params.offset(az * u.deg, el * u.deg)
+    residual = rng.normal(0, 3, (2, n))
+    residual[:, :30] += 100  # Outliers.
+    return {
+        "time": time,
+        "az": az,
+        "el": el,
+        "d_az": d_az.value + residual[0],
+        "d_el": d_el.value + residual[1],
+    }, residual
+
+
+class TestRunningStats:
+    def test_merge(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(5, 2, (1000, 2))
+        bins = rng.integers(-1, 4, 1000)
+
+        whole = RunningStats(3, 2)
+        whole.update(bins, values)
+        parts = [RunningStats(3, 2) for _ in range(3)]
+        for part, index in zip(parts, np.array_split(np.arange(1000), 3)):
+            part.update(bins[index], values[index])
+        merged = parts[0].merge(parts[1]).merge(parts[2])
+
+        for i in range(3):
+            expected = values[bins == i]
+            assert whole.count[i] == len(expected)
+            assert np.allclose(whole.mean[i], expected.mean(axis=0))
+            assert np.allclose(whole.variance[i], expected.var(axis=0))
+            assert np.allclose(whole.rms[i], np.sqrt((expected**2).mean(axis=0)))
+            assert np.allclose(merged.mean[i], whole.mean[i])
+            assert np.allclose(merged.variance[i], whole.variance[i])
+
+    def test_empty_bin(self):
+        stats = RunningStats(2)
+        stats.update(np.array([0, 0]), np.array([1.0, np.nan]))
+        assert stats.count.tolist() == [1, 0]
+        assert stats.mean[0, 0] == 1
+        assert np.isnan(stats.mean[1, 0]) and np.isnan(stats.std[1, 0])
+
+
+class TestResidualStats:
+    def test_update(self, params, records):
+        records, residual = records
+        stats = ResidualStats(params, np.arange(0, 11, 2), threshold=50 * u.arcsec)
+        for start in range(0, 3000, 1000):
+            stats.update({k: v[start : start + 1000] for k, v in records.items()})
+
+        table = stats.trend_table()
+        assert len(table) == 5
+        assert table["count"].sum() == 3000
+        assert table["outlier_rate"] @ table["count"] == 30
+        in_bin = (records["time"] >= 2) & (records["time"] < 4)
+        rms = np.sqrt((residual[:, in_bin] ** 2).mean(axis=1))
+        assert u.allclose(table["rms_d_az"][1], rms[0] * u.arcsec)
+        assert u.allclose(table["rms_d_el"][1], rms[1] * u.arcsec)
+
+        table = stats.azel_table()
+        assert len(table) == 18 * 9
+        assert table["count"].sum() == 3000
+        in_bin = (records["az"] < -240) & (records["el"] >= 80)
+        assert table["az_min"][-18] == -270 * u.deg
+        assert table["el_min"][-18] == 80 * u.deg
+        assert table["count"][-18] == in_bin.sum()
+        mean = residual[:, in_bin].mean(axis=1)
+        assert u.allclose(table["mean_d_el"][-18], mean[1] * u.arcsec)
+        rms_az, rms_el = stats.rms_map()
+        assert rms_az.shape == (9, 18)
+        assert rms_el[-1, 0] == table["rms_d_el"][-18]
+
+    def test_edges(self, params):
+        stats = ResidualStats(params, [0, 1, 2])
+        az, el = np.array([270, -270, 0, 280]), np.array([45, 45, 90, 45])
+        d_az, d_el = params.offset(az * u.deg, el * u.deg)
+        stats.update(
+            {
+                "time": np.array([2, 0, 1, 2.5]),
+                "az": az,
+                "el": el,
+                "d_az": d_az.value,
+                "d_el": d_el.value,
+            }
+        )
+        assert stats.trend.count.tolist() == [1, 2]
+        counts = stats.azel.count.reshape(9, 18)
+        assert counts.sum() == 3
+        assert counts[4, -1] == counts[4, 0] == counts[-1, 9] == 1
+
+    def test_from_files(self, tmp_path, params, records):
+        records, _ = records
+        header = ",".join(["note", *RECORD_COLUMNS])
+        data = np.column_stack([np.zeros(3000), *(records[k] for k in RECORD_COLUMNS)])
+        np.savetxt(tmp_path / "a.csv", data[:1200], delimiter=",", header=header)
+        (tmp_path / "a.csv").write_text((tmp_path / "a.csv").read_text().lstrip("# "))
+        np.save(tmp_path / "b.npy", data[1200:, 1:])
+        chunks = list(read_records(tmp_path / "a.csv", 500))
+        assert [len(chunk["el"]) for chunk in chunks] == [500, 500, 200]
+        assert np.allclose(chunks[2]["d_az"], records["d_az"][1000:1200])
+
+        time_bins = np.arange(11)
+        paths = [tmp_path / "a.csv", tmp_path / "b.npy"]
+        stats = ResidualStats.from_files(paths, params, time_bins, chunk_size=256)
+        expected = ResidualStats(params, time_bins)
+        expected.update(records)
+        assert np.array_equal(stats.trend.count, expected.trend.count)
+        assert np.allclose(stats.trend.mean, expected.trend.mean)
+        assert np.allclose(stats.azel.variance, expected.azel.variance, equal_nan=True)
+        assert np.array_equal(stats.azel_outliers, expected.azel_outliers)
+
+        parallel = ResidualStats.from_files(paths, params, time_bins, processes=2)
+        assert np.allclose(parallel.trend.rms, expected.trend.rms)
+
+        with pytest.raises(ValueError):
+            stats.merge(ResidualStats(params, np.arange(5)))
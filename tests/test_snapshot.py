@@ -0,0 +1,145 @@
+import shutil
+
+import astropy.units as u
+import numpy as np
+import pytest
+from astropy.coordinates import Angle
+from n_const import constants
+from n_const.data_format import DataClass, Versioned
+from n_const.obsparams import ObsParams
+from n_const.pointing import PointingError
+from n_const.snapshot import Snapshot, compile_snapshot, main
+
+
+@pytest.fixture
+def objects():
+    return {
+        "pointing": PointingError.from_file("tests/hosei_230.toml"),
+        "obsparams": ObsParams.from_file("tests/example.obs.toml"),
+    }
+
+
+class TestSnapshot:
+    def test_roundtrip(self, tmp_path, objects):
+        checksum = compile_snapshot(tmp_path / "site.ncss", objects)
+        snapshot = Snapshot(tmp_path / "site.ncss")
+        assert snapshot.checksum == checksum
+        assert list(snapshot) == [
+            "XFFTS",
+            "AC240",
+            "REST_FREQ",
+            "pointing",
+            "obsparams",
+        ]
+        for name, obj in objects.items():
+            assert isinstance(snapshot[name], type(obj))
+            assert snapshot[name] == obj
+            assert type(snapshot[name].copy()) is type(obj)
+        assert snapshot.XFFTS == constants.XFFTS
+        assert snapshot.REST_FREQ == constants.REST_FREQ
+        assert isinstance(snapshot.obsparams.LambdaOn, Angle)
+        assert snapshot.obsparams.LambdaOn.unit == u.hourangle
+
+    def test_versioned(self, tmp_path, objects):
+        published = Versioned(objects["obsparams"]).snapshot
+        compile_snapshot(tmp_path / "site.ncss", {"obsparams": published}, False)
+        snapshot = Snapshot(tmp_path / "site.ncss")
+        assert isinstance(snapshot.obsparams, ObsParams)
+        assert snapshot.obsparams == objects["obsparams"]
+
+        with pytest.raises(TypeError):
+            compile_snapshot(tmp_path / "other.ncss", {"table": {"a": 1}}, False)
+
+    def test_lazy(self, tmp_path, objects):
+        compile_snapshot(tmp_path / "site.ncss", objects, include_constants=False)
+        snapshot = Snapshot(tmp_path / "site.ncss")
+        assert len(snapshot) == 2
+        assert snapshot._cache == {}
+        assert snapshot.pointing is snapshot["pointing"]
+        assert list(snapshot._cache) == ["pointing"]
+        with pytest.raises(AttributeError):
+            _ = snapshot.unknown
+
+    def test_readonly(self, tmp_path, objects):
+        compile_snapshot(tmp_path / "site.ncss", objects, include_constants=False)
+        snapshot = Snapshot(tmp_path / "site.ncss")
+        with pytest.raises(TypeError):
+            snapshot.pointing["dAz"] = 0 * u.arcsec
+        with pytest.raises(TypeError):
+            snapshot.obsparams.update(DataClass(n=1))
+        assert snapshot.obsparams.n_scan == objects["obsparams"].n_scan
+
+        params = snapshot.obsparams.copy()
+        params["n"] = u.Quantity(1)
+        assert params.n_scan == 1
+        assert snapshot.obsparams == objects["obsparams"]
+
+    def test_values(self, tmp_path):
+        obj = DataClass(
+            a=None, b=True, c=-3, d=1.5, e="abc", f=[1, 2, 3] * u.m, g=Angle("1h")
+        )
+        compile_snapshot(tmp_path / "site.ncss", {"obj": obj}, False)
+        loaded = Snapshot(tmp_path / "site.ncss")["obj"]
+        assert list(loaded.keys()) == list(obj.keys())
+        for k in ["a", "b", "c", "d", "e"]:
+            assert loaded[k] == obj[k]
+            assert type(loaded[k]) is type(obj[k])
+        assert np.all(loaded.f == obj.f)
+        with pytest.raises(ValueError):
+            loaded.f[0] = 0 * u.m
+        assert loaded.g == obj.g
+
+        with pytest.raises(TypeError):
+            compile_snapshot(tmp_path / "x.ncss", {"obj": DataClass(a=object())})
+        with pytest.raises(TypeError):
+            compile_snapshot(tmp_path / "x.ncss", {"obj": {"a": 1}})
+
+    def test_corrupted(self, tmp_path, objects):
+        path = tmp_path / "site.ncss"
+        compile_snapshot(path, objects)
+        content = bytearray(path.read_bytes())
+        content[-1] ^= 0xFF
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            Snapshot(path)
+        assert len(Snapshot(path, verify=False)) == 5
+
+        content[4] += 1
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            Snapshot(path)
+        path.write_bytes(b"not a snapshot file")
+        with pytest.raises(ValueError):
+            Snapshot(path)
+
+    def test_main(self, tmp_path, objects):
+        main(
+            [
+                str(tmp_path / "site.ncss"),
+                "--pointing",
+                "radio=tests/hosei_230.toml",
+                "-o",
+                "tests/example.obs.toml",
+            ]
+        )
+        snapshot = Snapshot(tmp_path / "site.ncss")
+        assert list(snapshot)[-2:] == ["radio", "obsparams"]
+        assert snapshot.radio == objects["pointing"]
+
+        # Paths may contain "=", e.g. partitioned directories.
+        partitioned = tmp_path / "date=2024-06"
+        partitioned.mkdir()
+        shutil.copy("tests/hosei_230.toml", partitioned / "pointing.toml")
+        main(
+            [
+                str(tmp_path / "other.ncss"),
+                "-p",
+                str(partitioned / "pointing.toml"),
+                "-p",
+                f"optical={partitioned / 'pointing.toml'}",
+                "--no-constants",
+            ]
+        )
+        snapshot = Snapshot(tmp_path / "other.ncss")
+        assert list(snapshot) == ["pointing", "optical"]
+        assert snapshot.optical == objects["pointing"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from n_const.data_format import DataClass
+from n_const.table import ConfigTable
+
+
+@pytest.fixture
+def table():
+    return ConfigTable.from_csv(
+        "tests/board_config.csv", indexes=[("beam", "polarization", "sideband")]
+    )
+
+
+class TestConfigTable:
+    def test_columns(self, table):
+        assert table.columns == ("topicname", "beam", "polarization", "sideband")
+        assert table.key == "topicname"
+        assert len(table) == 40
+        assert table.column("beam").dtype == np.int64
+        assert table.column("sideband").dtype.kind == "U"
+        with pytest.raises(ValueError):
+            table.column("beam")[0] = 100
+
+    def test_getitem(self, table):
+        assert table["ac240_tp_data_3"] == DataClass(
+            topicname="ac240_tp_data_3", beam=1, polarization="R", sideband="L"
+        )
+        assert table["ac240_tp_data_3"] is table["ac240_tp_data_3"]
+        with pytest.raises(KeyError):
+            _ = table["unknown_topic"]
+
+    def test_loc(self, table):
+        assert table.loc("ac240_tp_data_1") == 0
+        assert table.loc("xffts_power_board01") == 4
+        assert "xffts_power_board01" in table
+        assert list(table)[:2] == ["ac240_tp_data_1", "ac240_tp_data_2"]
+
+    def test_find(self, table):
+        assert table.find(beam=2, polarization="L", sideband="U") == (4, 24)
+        assert table.find(beam=100, polarization="L", sideband="U") == ()
+        assert table.find(sideband="U", beam=2, polarization="L") == (4, 24)
+        index = table.index("beam", "polarization", "sideband")
+        assert index[(1, "R", "U")] == (3, 23)
+        assert table.index("sideband", "beam", "polarization") is index
+        with pytest.raises(KeyError):
+            table.find(beam=2)
+        with pytest.raises(KeyError):
+            table.index("beam")
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            ConfigTable({"a": [1, 2], "b": [1]})
+        with pytest.raises(ValueError):
+            ConfigTable({"a": [1, 1], "b": [1, 2]})
+        with pytest.raises(KeyError):
+            ConfigTable({"a": [1, 2]}, indexes=[("b",)])
+        assert ConfigTable({"a": [1, 1], "b": [1, 2]}, key="b").loc(2) == 1
+
+    def test_dtypes(self, tmp_path):
+        (tmp_path / "boards.csv").write_text("id,slot,gain\n001,01,1.5\n002,02,2\n")
+        table = ConfigTable.from_csv(tmp_path / "boards.csv")
+        assert table.loc("001") == 0
+        assert table["002"].slot == 2
+        assert table.column("gain").dtype == np.float64
+        with pytest.raises(KeyError):
+            table.loc(1)
+
+        table = ConfigTable.from_csv(
+            tmp_path / "boards.csv", dtypes={"id": int, "slot": str}
+        )
+        assert table.loc(1) == 0
+        assert table[2].slot == "02"
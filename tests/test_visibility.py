@@ -0,0 +1,102 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from astropy.coordinates import AltAz, SkyCoord
+from astropy.time import Time
+from n_const.constants import LOC_NANTEN2
+from n_const.obsparams import ObsParams
+from n_const import visibility
+from n_const.visibility import VisibilityPlanner, targets_from_obsparams
+
+start, stop = Time("2024-06-01"), Time("2024-06-02")
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return VisibilityPlanner()
+
+
+@pytest.fixture
+def targets():
+    return SkyCoord(
+        ["5h35m17s -5d23m28s", "17h45m40s -29d00m28s", "0h0m0s 80d", "3h0m0s -89d"]
+    )
+
+
+def altaz(targets, times):
+    frame = AltAz(obstime=times, location=LOC_NANTEN2)
+    return targets.transform_to(frame).alt
+
+
+class TestVisibilityPlanner:
+    def test_elevation(self, planner, targets):
+        times, el = planner.elevation(targets, start, stop, 1 * u.min)
+        assert times.shape == (1441,)
+        assert el.shape == (4, 1441)
+        expected = altaz(targets[:, None], times[None, ::120])
+        assert np.abs(el[:, ::120] - expected).max() < 2 * u.arcsec
+
+    def test_time_grid(self, planner):
+        grid = planner.time_grid(start, stop, 1 * u.hour)
+        assert planner.time_grid(start, stop, 1 * u.hour) is grid
+        assert len(grid.times) == 25
+        assert np.all(np.diff(grid.lst) > 0)
+
+    def test_windows(self, planner, targets):
+        windows = planner.windows(targets, start, stop, 20 * u.deg)
+        assert list(windows.target) == [0, 1, 3]
+        assert np.all(windows.rise < windows.set)
+
+        el = altaz(targets[windows.target], windows.rise)
+        assert np.abs(el[:2] - 20 * u.deg).max() < 2 * u.arcsec
+        el = altaz(targets[windows.target], windows.set)
+        assert np.abs(el[:2] - 20 * u.deg).max() < 2 * u.arcsec
+
+        # Circumpolar target is visible all the time.
+        assert windows.rise[2] == start
+        assert abs(windows.set[2] - stop) < 1 * u.ms
+
+    def test_windows_split(self, planner):
+        target = SkyCoord(["12h0m0s -20d"])
+        windows = planner.windows(target, start, stop, 20 * u.deg, step=5 * u.min)
+        assert list(windows.target) == [0, 0]
+        assert windows.rise[0] == start
+        assert abs(windows.set[1] - stop) < 1 * u.ms
+        el = altaz(target[0], Time([windows.set[0], windows.rise[1]]))
+        assert np.abs(el - 20 * u.deg).max() < 2 * u.arcsec
+
+    def test_windows_partial_step(self, planner):
+        # ``stop`` is not a multiple of ``step`` away from ``start``.
+        stop = Time("2024-06-01T07:03")
+        rng = np.random.default_rng(1)
+        targets = SkyCoord(
+            rng.uniform(0, 360, 500) * u.deg,
+            np.degrees(np.arcsin(rng.uniform(-1, 1, 500))) * u.deg,
+        )
+        windows = planner.windows(targets, start, stop, 20 * u.deg)
+        assert np.all(windows.rise < windows.set)
+        assert np.all(windows.set <= stop)
+
+        el = altaz(targets[windows.target], Time([start, stop])[:, None]).T
+        assert np.all(el[windows.rise == start, 0] > 20 * u.deg - 2 * u.arcsec)
+        at_stop = abs(windows.set - stop) < 1 * u.ms
+        assert np.all(el[at_stop, 1] > 20 * u.deg - 2 * u.arcsec)
+
+    def test_without_tete(self, targets, monkeypatch):
+        # Frame ``TETE`` is not available in astropy<4.1.
+        monkeypatch.setattr(visibility, "TETE", None)
+        times, el = VisibilityPlanner().elevation(targets, start, stop, 1 * u.min)
+        expected = altaz(targets[:, None], times[None, ::120])
+        assert np.abs(el[:, ::120] - expected).max() < 2 * u.arcsec
+
+
+def test_targets_from_obsparams():
+    params = ObsParams.from_file("tests/example.obs.toml")
+    targets = targets_from_obsparams([params, params])
+    assert targets.shape == (2,)
+    expected = SkyCoord(params.LambdaOn, params.BetaOn, frame="fk5").icrs
+    assert targets[0].separation(expected) < 1e-3 * u.arcsec
+
+    params["COORD_SYS"] = "HORIZONTAL"
+    with pytest.raises(ValueError):
+        targets_from_obsparams([params])